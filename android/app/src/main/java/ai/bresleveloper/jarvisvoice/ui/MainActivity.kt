@@ -186,6 +186,15 @@ class MainActivity : AppCompatActivity() {
                 addTranscript("Jarvis", text, null, isUser = false)
             }
 
+            "flush" -> audioPlayer?.clearQueue()
+
+            "busy" -> {
+                val msg = json.optString("message")
+                addTranscript("Jarvis", "📵 $msg", null, isUser = false)
+                endCall()
+                setStatus("Busy", R.color.hangup_red)
+            }
+
             "error" -> {
                 val msg = json.optString("message")
                 addTranscript("Jarvis", "⚠️ $msg", null, isUser = false)
@@ -0,0 +1,350 @@
+"""End-to-end load benchmark for the voice server.
+
+Starts the real create_app() app against a stub OpenClaw gateway and an
+offline TTS, then replays recorded 16 kHz PCM utterances from N concurrent
+simulated callers speaking the /ws protocol (connect, binary audio, hangup).
+Reports p50/p95/p99 turn latency, calls sustained per core and memory per call.
+
+Usage:
+    python bench_load.py --clients 1,2,4,8 --turns 3
+    python bench_load.py --corpus ~/utterances --clients 4 --output load.json
+
+Turn latency is measured the way a caller feels it: from the end of the
+utterance audio to the first reply audio received (so it includes the VAD stop
+window, less any trailing silence in the recording). Audio is streamed in real
+time, followed by silence, like the web client's microphone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import ClientSession, WSMsgType, web
+
+SAMPLE_RATE = 16000
+CHUNK_BYTES = 4096 * 2  # the web client sends 4096-sample frames
+CHUNK_SECS = CHUNK_BYTES / (SAMPLE_RATE * 2)
+DEFAULT_CORPUS = Path(__file__).parent / "sounds" / "greetings"
+
+
+# ── Corpus ─────────────────────────────────────────────────────
+def load_corpus(path: Path) -> list[bytes]:
+    """Load 16 kHz mono 16-bit utterances (.wav, or headerless .pcm/.raw)."""
+    files = sorted(path.glob("*")) if path.is_dir() else [path]
+    corpus = []
+    for file in files:
+        if file.suffix == ".wav":
+            with wave.open(str(file), "rb") as wf:
+                if (wf.getframerate(), wf.getnchannels(), wf.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                    sys.exit(f"{file}: expected 16 kHz mono 16-bit audio")
+                corpus.append(wf.readframes(wf.getnframes()))
+        elif file.suffix in (".pcm", ".raw"):
+            corpus.append(file.read_bytes())
+    if not corpus:
+        sys.exit(f"No .wav/.pcm utterances found in {path}")
+    return corpus
+
+
+# ── Stub OpenClaw ──────────────────────────────────────────────
+def create_stub_openclaw(reply: str, first_byte_secs: float, token_secs: float) -> web.Application:
+    """Chat Completions stand-in: fixed reply after a delay, streamed word by word."""
+
+    async def completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        await asyncio.sleep(first_byte_secs)
+        if not body.get("stream"):
+            return web.json_response({"choices": [{"message": {"content": reply}}]})
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for i, word in enumerate(reply.split(" ")):
+            delta = word if i == 0 else " " + word
+            chunk = {"choices": [{"delta": {"content": delta}}]}
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(token_secs)
+        await resp.write(b"data: [DONE]\n\n")
+        return resp
+
+    async def head(request: web.Request) -> web.Response:
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    app.router.add_route("HEAD", "/", head)
+    return app
+
+
+# ── Offline TTS ────────────────────────────────────────────────
+class OfflineTTS:
+    """Drop-in for the shared Edge TTS: near-silent PCM sized to the text, no network."""
+
+    def __init__(self, sample_rate: int, frame_ms: int, first_audio_secs: float, secs_per_char: float = 0.06):
+        self._sample_rate = sample_rate
+        self._frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self._first_audio_secs = first_audio_secs
+        self._secs_per_char = secs_per_char
+        self._requests = 0
+
+    async def run_tts(self, text: str, context_id: str):
+        from pipecat.frames.frames import TTSAudioRawFrame, TTSStartedFrame, TTSStoppedFrame
+
+        self._requests += 1
+        yield TTSStartedFrame()
+        await asyncio.sleep(self._first_audio_secs)
+        total = int(len(text) * self._secs_per_char * self._sample_rate) * 2
+        for offset in range(0, total, self._frame_bytes):
+            frame = bytes(min(self._frame_bytes, total - offset))
+            yield TTSAudioRawFrame(audio=frame, sample_rate=self._sample_rate, num_channels=1)
+            await asyncio.sleep(0)
+        yield TTSStoppedFrame()
+
+    async def prewarm(self, phrases: list[str]):
+        pass
+
+    def stats(self) -> dict:
+        return {"requests": self._requests, "backend": "offline"}
+
+    def cache_stats(self) -> dict:
+        return {}
+
+
+# ── Simulated caller ───────────────────────────────────────────
+@dataclass
+class CallResult:
+    latencies: list[float] = field(default_factory=list)
+    failed_turns: int = 0
+    rejected: bool = False
+    error: Optional[str] = None
+
+
+async def stream_audio(ws, speech: bytes, speech_end: asyncio.Future):
+    """Send speech then silence, paced in real time, until cancelled."""
+    silence = bytes(CHUNK_BYTES)
+    next_send = time.monotonic()
+    offset = 0
+    while True:
+        if offset < len(speech):
+            chunk = speech[offset:offset + CHUNK_BYTES]
+            offset += len(chunk)
+        else:
+            chunk = silence
+        await ws.send_bytes(chunk)
+        if offset >= len(speech) and not speech_end.done():
+            speech_end.set_result(time.monotonic())
+        next_send += CHUNK_SECS
+        await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+
+
+async def run_caller(http: ClientSession, url: str, corpus: list[bytes], first: int,
+                     turns: int, turn_timeout: float) -> CallResult:
+    result = CallResult()
+    async with http.ws_connect(url) as ws:
+        await ws.send_str(json.dumps({"type": "connect", "timezone": "UTC"}))
+
+        # Admission, then let the greeting finish
+        while True:
+            msg = await ws.receive(timeout=turn_timeout)
+            if msg.type == WSMsgType.BINARY:
+                continue  # ring, pickup, greeting
+            if msg.type != WSMsgType.TEXT:
+                result.error = f"closed during greeting ({msg.type.name})"
+                return result
+            data = json.loads(msg.data)
+            if data.get("type") == "busy":
+                result.rejected = True
+                return result
+            if data == {"type": "state", "state": "listening"}:
+                break
+
+        for turn in range(turns):
+            speech = corpus[(first + turn) % len(corpus)]
+            speech_end = asyncio.get_running_loop().create_future()
+            sender = asyncio.create_task(stream_audio(ws, speech, speech_end))
+            first_audio = None
+            try:
+                while True:
+                    msg = await ws.receive(timeout=turn_timeout)
+                    if msg.type == WSMsgType.BINARY:
+                        if first_audio is None and speech_end.done():
+                            first_audio = time.monotonic()
+                    elif msg.type == WSMsgType.TEXT:
+                        kind = json.loads(msg.data).get("type")
+                        if kind in ("done", "error"):
+                            break
+                    else:
+                        result.error = f"closed mid-turn ({msg.type.name})"
+                        return result
+            except asyncio.TimeoutError:
+                result.failed_turns += 1
+                continue
+            finally:
+                sender.cancel()
+            if first_audio is not None:
+                result.latencies.append(first_audio - speech_end.result())
+            else:
+                result.failed_turns += 1
+
+        await ws.send_str(json.dumps({"type": "hangup"}))
+    return result
+
+
+# ── Measurement ────────────────────────────────────────────────
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values: list[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))
+    return round(ordered[index], 3)
+
+
+async def run_level(url: str, corpus: list[bytes], clients: int, args) -> dict:
+    """Run `clients` concurrent callers once and summarize."""
+    baseline = rss_bytes()
+    peak = baseline
+
+    async def sample_memory():
+        nonlocal peak
+        while True:
+            peak = max(peak, rss_bytes())
+            await asyncio.sleep(0.1)
+
+    async def caller(i: int) -> CallResult:
+        await asyncio.sleep(i * args.stagger / clients)
+        try:
+            return await run_caller(http, url, corpus, i, args.turns, args.turn_timeout)
+        except Exception as e:
+            return CallResult(error=f"{type(e).__name__}: {e}")
+
+    sampler = asyncio.create_task(sample_memory())
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    async with ClientSession() as http:
+        results = await asyncio.gather(*(caller(i) for i in range(clients)))
+    cpu_secs, wall_secs = time.process_time() - cpu_start, time.monotonic() - wall_start
+    sampler.cancel()
+
+    latencies = [lat for r in results for lat in r.latencies]
+    errors = [r.error for r in results if r.error]
+    return {
+        "clients": clients,
+        "turns": len(latencies),
+        "failedTurns": sum(r.failed_turns for r in results),
+        "rejectedCalls": sum(r.rejected for r in results),
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "cpuUtilization": round(cpu_secs / wall_secs / (os.cpu_count() or 1), 3),
+        "memPerCallMB": round((peak - baseline) / clients / 1e6, 2),
+        "wallSecs": round(wall_secs, 1),
+    }
+
+
+def sustained(level: dict, slo: float) -> bool:
+    """Every call admitted, every turn answered, p95 within the SLO."""
+    return (not level["errors"] and not level["failedTurns"] and not level["rejectedCalls"]
+            and level["p95"] is not None and level["p95"] <= slo)
+
+
+# ── Main ───────────────────────────────────────────────────────
+async def wait_ready(base: str, timeout: float = 300):
+    """Poll /api/ready until the server has loaded and warmed its models."""
+    deadline = time.monotonic() + timeout
+    async with ClientSession() as http:
+        while True:
+            async with http.get(f"{base}/api/ready") as resp:
+                if resp.status == 200:
+                    return
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server not ready after {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+async def run(args) -> dict:
+    corpus = load_corpus(Path(args.corpus))
+    levels = [int(n) for n in args.clients.split(",")]
+
+    stub = web.AppRunner(create_stub_openclaw(args.reply, args.llm_delay, args.token_delay))
+    await stub.setup()
+    await web.TCPSite(stub, "127.0.0.1", 0).start()
+    stub_port = stub.addresses[0][1]
+
+    # main.py reads its config at import time
+    os.environ["OPENCLAW_URL"] = f"http://127.0.0.1:{stub_port}"
+    os.environ["OPENCLAW_TOKEN"] = "bench"
+    os.environ["MAX_CONCURRENT_CALLS"] = str(max(levels))
+    import main as server
+    server._shared_tts = OfflineTTS(SAMPLE_RATE, server.TTS_FRAME_MS, args.tts_delay)
+
+    app = web.AppRunner(server.create_app())
+    await app.setup()
+    await web.TCPSite(app, "127.0.0.1", 0).start()
+    base = f"http://127.0.0.1:{app.addresses[0][1]}"
+    url = f"{base}/ws"
+    await wait_ready(base)
+
+    report = {
+        "whisperModel": server.WHISPER_MODEL,
+        "vadStopSecs": server.VAD_STOP_SECS,
+        "cores": os.cpu_count(),
+        "corpus": len(corpus),
+        "levels": [],
+    }
+    try:
+        for clients in levels:
+            level = await run_level(url, corpus, clients, args)
+            level["sustained"] = sustained(level, args.slo)
+            report["levels"].append(level)
+            print(f"{clients:>4} calls  p50={level['p50']}s p95={level['p95']}s p99={level['p99']}s  "
+                  f"failed={level['failedTurns']} rejected={level['rejectedCalls']} errors={len(level['errors'])}  "
+                  f"cpu={level['cpuUtilization']:.0%}  mem/call={level['memPerCallMB']}MB"
+                  f"{'' if level['sustained'] else '  (not sustained)'}")
+    finally:
+        await app.cleanup()
+        await stub.cleanup()
+
+    best = max((lvl["clients"] for lvl in report["levels"] if lvl["sustained"]), default=0)
+    report["callsPerCore"] = round(best / (os.cpu_count() or 1), 2)
+    print(f"Sustained {best} calls within p95 ≤ {args.slo}s → {report['callsPerCore']} calls per core")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="1,2,4", help="comma-separated concurrency levels")
+    parser.add_argument("--turns", type=int, default=3, help="utterances per call")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="directory of 16 kHz .wav/.pcm utterances")
+    parser.add_argument("--llm-delay", type=float, default=0.3, help="stub OpenClaw time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="stub OpenClaw delay per streamed word (s)")
+    parser.add_argument("--tts-delay", type=float, default=0.15, help="offline TTS time to first audio (s)")
+    parser.add_argument("--reply", default="Certainly sir. The weather is fine today. Anything else?")
+    parser.add_argument("--stagger", type=float, default=1.0, help="spread call starts over this many seconds")
+    parser.add_argument("--turn-timeout", type=float, default=20.0)
+    parser.add_argument("--slo", type=float, default=2.0, help="p95 turn latency a sustained level must meet (s)")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Micro-benchmarks for the audio hot path.
+
+Times the per-frame and per-turn pieces of a call in isolation:
+
+    vad         per-call VAD on the shared Silero model, per uplink frame and per batch
+    convert     int16 → float32 conversion before Whisper
+    stt         faster-whisper transcription across utterance lengths and model sizes
+    mp3         MP3 → PCM decode throughput (the decoder pool behind Edge TTS)
+    call_state  transition_state and CallManager call lifecycle overhead
+
+Usage:
+    python bench_micro.py --output micro.json
+    python bench_micro.py --only vad,convert --whisper-models tiny,base
+
+Results are written as JSON with the commit, CPU and library versions, so runs
+can be compared across commits and machines.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SOUNDS_DIR = Path(__file__).parent / "sounds"
+BENCHMARKS = ("vad", "convert", "stt", "mp3", "call_state")
+
+
+# ── Timing ─────────────────────────────────────────────────────
+def summarize(name: str, samples: list[float], **params) -> dict:
+    """Per-operation timing stats (seconds) for one benchmark case."""
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    return {
+        "name": name,
+        "params": params,
+        "runs": len(ordered),
+        "mean": mean,
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min": ordered[0],
+        "opsPerSec": 1 / mean if mean else None,
+    }
+
+
+def time_sync(fn: Callable[[], object], runs: int, warmup: int = 3) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def time_async(fn: Callable[[], Awaitable[object]], runs: int, warmup: int = 3) -> list[float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# ── Audio fixtures ─────────────────────────────────────────────
+def speech_pcm(seconds: float) -> bytes:
+    """Recorded speech (the greeting clips) looped to the requested length."""
+    clips = []
+    for path in sorted((SOUNDS_DIR / "greetings").glob("*.wav")):
+        with wave.open(str(path), "rb") as wf:
+            clips.append(wf.readframes(wf.getnframes()))
+    speech = b"".join(clips) or np.random.default_rng(0).integers(-3000, 3000, SAMPLE_RATE, dtype=np.int16).tobytes()
+    needed = int(seconds * SAMPLE_RATE) * 2
+    return (speech * (needed // len(speech) + 1))[:needed]
+
+
+def encode_mp3(pcm: bytes) -> Optional[bytes]:
+    """Encode PCM to MP3 (like Edge TTS output) with PyAV, or ffmpeg as a fallback."""
+    try:
+        import av
+        import io
+        out = io.BytesIO()
+        with av.open(out, "w", format="mp3") as container:
+            stream = container.add_stream("mp3", rate=24000)
+            stream.bit_rate = 48000
+            frame = av.AudioFrame.from_ndarray(np.frombuffer(pcm, np.int16)[None, :], format="s16", layout="mono")
+            frame.sample_rate = SAMPLE_RATE
+            resampler = av.AudioResampler(format=stream.codec_context.format.name, layout="mono", rate=24000)
+            for resampled in resampler.resample(frame) + resampler.resample(None):
+                container.mux(stream.encode(resampled))
+            container.mux(stream.encode(None))
+        return out.getvalue()
+    except ModuleNotFoundError:
+        pass
+    try:
+        return subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+             "-ar", "24000", "-b:a", "48k", "-f", "mp3", "pipe:1"],
+            input=pcm, capture_output=True, check=True,
+        ).stdout
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        return None
+
+
+# ── Benchmarks ─────────────────────────────────────────────────
+async def bench_vad(args) -> list[dict]:
+    from pipecat.audio.vad.vad_analyzer import VADParams
+    from vad_engine import CallVAD, SileroModel
+
+    params = VADParams(stop_secs=0.6, start_secs=0.3, confidence=0.6, min_volume=0.4)
+    model = SileroModel(SAMPLE_RATE)
+    results = [summarize("vad.create", time_sync(lambda: CallVAD(model, params), args.runs * 5), per="call")]
+    pcm = speech_pcm(10)
+    for frame_samples in (512, 4096):  # Silero's window, the web client's frame
+        vad = CallVAD(model, params)
+        frame_bytes = frame_samples * 2
+        frames = [pcm[i:i + frame_bytes] for i in range(0, len(pcm) - frame_bytes + 1, frame_bytes)]
+        position = 0
+
+        async def analyze():
+            nonlocal position
+            await vad.analyze_audio(frames[position % len(frames)])
+            position += 1
+
+        samples = await time_async(analyze, args.runs * 5)
+        result = summarize("vad.analyze_audio", samples, frame_samples=frame_samples)
+        result["realtimeFactor"] = (frame_samples / SAMPLE_RATE) / result["mean"]
+        results.append(result)
+
+    # One inference over many calls' windows, as VADEngine runs it each tick
+    window = np.frombuffer(pcm[:model.window * 2], dtype=np.int16).astype(np.float32) / 32768
+    for streams in (1, 8, 32, 64):
+        windows = np.repeat(window[None, :], streams, axis=0)
+        state, context = model.new_state(streams)
+        samples = time_sync(lambda: model.infer(windows, state, context), args.runs * 5)
+        result = summarize("vad.batch_infer", samples, streams=streams)
+        result["windowsPerSec"] = streams / result["mean"]
+        results.append(result)
+    return results
+
+
+def bench_convert(args) -> list[dict]:
+    from stt_engine import pcm_to_float32
+
+    results = []
+    for seconds in (1, 5, 20):
+        pcm = speech_pcm(seconds)
+        samples = time_sync(lambda: pcm_to_float32(pcm), args.runs * 5)
+        result = summarize("convert.pcm_to_float32", samples, seconds=seconds)
+        result["bytesPerSec"] = len(pcm) / result["mean"]
+        results.append(result)
+    return results
+
+
+async def bench_stt(args) -> list[dict]:
+    from stt_engine import STTEngine, pcm_to_float32
+
+    results = []
+    for model in args.whisper_models.split(","):
+        load_start = time.perf_counter()
+        engine = STTEngine(model, workers=1)
+        load_secs = time.perf_counter() - load_start
+        await engine.start()
+        try:
+            for seconds in (1, 3, 10):
+                audio = pcm_to_float32(speech_pcm(seconds))
+                samples = await time_async(lambda: engine.transcribe("bench", audio), args.stt_runs, warmup=1)
+                result = summarize("stt.transcribe", samples, model=model, seconds=seconds)
+                result["realtimeFactor"] = seconds / result["mean"]
+                result["modelLoadSecs"] = load_secs
+                results.append(result)
+        finally:
+            await engine.stop()
+    return results
+
+
+async def bench_mp3(args) -> list[dict]:
+    from mp3_decoder import DecoderUnavailable, MP3DecoderPool
+
+    results = []
+    seconds = 5
+    mp3 = encode_mp3(speech_pcm(seconds))
+    if mp3 is None:
+        return [{"name": "mp3.decode", "skipped": "no MP3 encoder (PyAV or ffmpeg) available"}]
+    for backend in ("pyav", "ffmpeg"):
+        pool = MP3DecoderPool(sample_rate=SAMPLE_RATE, size=1, backend=backend)
+        try:
+            pool.check()
+        except DecoderUnavailable as e:
+            results.append({"name": "mp3.decode", "params": {"backend": backend}, "skipped": str(e)})
+            continue
+        samples = await time_async(lambda: pool.decode(mp3), args.runs)
+        result = summarize("mp3.decode", samples, backend=backend, seconds=seconds, mp3_bytes=len(mp3))
+        result["realtimeFactor"] = seconds / result["mean"]
+        results.append(result)
+    return results
+
+
+async def bench_call_state(args) -> list[dict]:
+    from call_state import CallManager, CallRecord, CallState, transition_state
+
+    setup = (CallState.RINGING, CallState.ANSWERED, CallState.ACTIVE)
+    conversation = (CallState.SPEAKING, CallState.LISTENING) * 10
+    transitions = len(setup) + len(conversation)
+
+    def turn_cycle():
+        call = CallRecord(call_id="bench")
+        for state in setup + conversation:
+            transition_state(call, state)
+
+    manager = CallManager(max_concurrent_calls=1_000_000)
+
+    def lifecycle():
+        call = manager.start_call()
+        for state in setup + conversation:
+            manager.transition(call.call_id, state)
+        manager.add_transcript(call.call_id, "user", "hello")
+        manager.end_call(call.call_id, CallState.HANGUP_USER)
+
+    runs = args.runs * 20
+    return [
+        summarize("call_state.transition_state", [t / transitions for t in time_sync(turn_cycle, runs)],
+                  per="transition"),
+        summarize("call_state.CallManager", time_sync(lifecycle, runs), per="call", transitions=transitions),
+    ]
+
+
+# ── Main ───────────────────────────────────────────────────────
+def environment() -> dict:
+    """Where the numbers came from."""
+    commit = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        pass
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "cpu": cpu,
+        "cores": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+async def run(args) -> dict:
+    runners = {
+        "vad": bench_vad,
+        "convert": bench_convert,
+        "stt": bench_stt,
+        "mp3": bench_mp3,
+        "call_state": bench_call_state,
+    }
+    report = {"environment": environment(), "results": []}
+    for name in args.only.split(","):
+        print(f"── {name}")
+        try:
+            outcome = runners[name](args)
+            results = await outcome if asyncio.iscoroutine(outcome) else outcome
+        except ModuleNotFoundError as e:
+            results = [{"name": name, "skipped": f"missing dependency: {e.name}"}]
+        for result in results:
+            report["results"].append(result)
+            if "skipped" in result:
+                print(f"   {result['name']}: skipped ({result['skipped']})")
+            else:
+                params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+                print(f"   {result['name']} {params}: mean {result['mean'] * 1e3:.3f} ms, "
+                      f"p95 {result['p95'] * 1e3:.3f} ms")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--whisper-models", default=os.getenv("WHISPER_MODEL", "tiny"), help="comma-separated model sizes")
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per case (scaled up for cheap cases)")
+    parser.add_argument("--stt-runs", type=int, default=5, help="timed runs per transcription case")
+    parser.add_argument("--output", default="bench_micro.json", help="where to write the JSON results")
+    args = parser.parse_args()
+
+    unknown = set(args.only.split(",")) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -125,79 +125,99 @@ def transition_state(call: CallRecord, new_state: CallState) -> bool:
 
 
 class CallManager:
-    """Manages active calls with max duration safety timer."""
+    """Registry of concurrent calls, each with its own max duration safety timer."""
 
-    def __init__(self, max_duration_min: int = 30):
+    def __init__(self, max_duration_min: int = 30, max_concurrent_calls: int = 4):
         self._max_duration_min = max_duration_min
-        self._active_call: Optional[CallRecord] = None
-        self._duration_timer: Optional[asyncio.Task] = None
-        self._on_timeout: Optional[Callable[[str], Awaitable[None]]] = None
+        self._max_concurrent_calls = max_concurrent_calls
+        self._calls: dict[str, CallRecord] = {}
+        self._duration_timers: dict[str, asyncio.Task] = {}
+        self._on_timeout: dict[str, Callable[[str], Awaitable[None]]] = {}
 
     @property
-    def active_call(self) -> Optional[CallRecord]:
-        return self._active_call
+    def active_calls(self) -> list[CallRecord]:
+        return list(self._calls.values())
 
-    def start_call(self, on_timeout: Optional[Callable[[str], Awaitable[None]]] = None) -> CallRecord:
-        """Start a new call. Ends any existing call first."""
-        if self._active_call and not self._active_call.is_terminal:
-            self.end_call(CallState.HANGUP_BOT)
+    @property
+    def active_count(self) -> int:
+        return len(self._calls)
+
+    @property
+    def max_concurrent_calls(self) -> int:
+        return self._max_concurrent_calls
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._calls) >= self._max_concurrent_calls
+
+    def get(self, call_id: str) -> Optional[CallRecord]:
+        return self._calls.get(call_id)
+
+    def start_call(self, on_timeout: Optional[Callable[[str], Awaitable[None]]] = None) -> Optional[CallRecord]:
+        """Register a new call. Returns None if the concurrent call limit is reached."""
+        if self.is_full:
+            return None
 
         call = CallRecord()
-        self._active_call = call
-        self._on_timeout = on_timeout
+        self._calls[call.call_id] = call
+        if on_timeout:
+            self._on_timeout[call.call_id] = on_timeout
         return call
 
-    def transition(self, new_state: CallState) -> bool:
-        """Transition the active call to a new state."""
-        if not self._active_call:
+    def transition(self, call_id: str, new_state: CallState) -> bool:
+        """Transition a registered call to a new state."""
+        call = self._calls.get(call_id)
+        if not call:
             return False
 
-        result = transition_state(self._active_call, new_state)
+        result = transition_state(call, new_state)
 
         # Start duration timer when call is answered
         if result and new_state == CallState.ANSWERED:
-            self._start_duration_timer()
+            self._start_duration_timer(call_id)
 
         # Clean up on terminal
-        if result and self._active_call.is_terminal:
-            self._cancel_duration_timer()
+        if result and call.is_terminal:
+            self._cancel_duration_timer(call_id)
 
         return result
 
-    def end_call(self, reason: CallState = CallState.COMPLETED) -> Optional[CallRecord]:
-        """End the active call."""
-        if not self._active_call:
+    def end_call(self, call_id: str, reason: CallState = CallState.COMPLETED) -> Optional[CallRecord]:
+        """End a call and remove it from the registry."""
+        if call_id not in self._calls:
             return None
 
-        self.transition(reason)
-        self._cancel_duration_timer()
-        call = self._active_call
-        self._active_call = None
-        return call
-
-    def add_transcript(self, speaker: str, text: str):
-        """Add a transcript entry to the active call."""
-        if self._active_call and not self._active_call.is_terminal:
-            self._active_call.add_transcript(speaker, text)
-
-    def _start_duration_timer(self):
-        """Start the max duration safety timer."""
-        self._cancel_duration_timer()
-        self._duration_timer = asyncio.create_task(self._duration_watchdog())
-
-    def _cancel_duration_timer(self):
-        """Cancel the duration timer if running."""
-        if self._duration_timer and not self._duration_timer.done():
-            self._duration_timer.cancel()
-            self._duration_timer = None
-
-    async def _duration_watchdog(self):
-        """Auto-hangup after max duration."""
+        self.transition(call_id, reason)
+        self._cancel_duration_timer(call_id)
+        self._on_timeout.pop(call_id, None)
+        return self._calls.pop(call_id)
+
+    def add_transcript(self, call_id: str, speaker: str, text: str):
+        """Add a transcript entry to a registered call."""
+        call = self._calls.get(call_id)
+        if call and not call.is_terminal:
+            call.add_transcript(speaker, text)
+
+    def _start_duration_timer(self, call_id: str):
+        """Start the max duration safety timer for one call."""
+        self._cancel_duration_timer(call_id)
+        self._duration_timers[call_id] = asyncio.create_task(self._duration_watchdog(call_id))
+
+    def _cancel_duration_timer(self, call_id: str):
+        """Cancel a call's duration timer if running."""
+        timer = self._duration_timers.pop(call_id, None)
+        if timer and not timer.done() and timer is not asyncio.current_task():
+            timer.cancel()
+
+    async def _duration_watchdog(self, call_id: str):
+        """Auto-hangup a call after max duration."""
         try:
             await asyncio.sleep(self._max_duration_min * 60)
-            if self._active_call and not self._active_call.is_terminal:
-                self.transition(CallState.TIMEOUT)
-                if self._on_timeout and self._active_call:
-                    await self._on_timeout(self._active_call.call_id)
+            call = self._calls.get(call_id)
+            if call and not call.is_terminal:
+                self.transition(call_id, CallState.TIMEOUT)
+                on_timeout = self._on_timeout.get(call_id)
+                if on_timeout:
+                    await on_timeout(call_id)
         except asyncio.CancelledError:
             pass
@@ -0,0 +1,193 @@
+"""Per-call outbound scheduler: audio leaves at real time plus a small lead.
+
+Audio (TTS, ring, pickup, greeting) is queued as fixed-size PCM frames in order
+with JSON control messages. The sender releases a frame only once the client
+is within `lead_secs` of running out of audio to play. Unsent audio stays
+on the server, where a barge-in can still drop it, and a slow client never
+has whole replies pushed at it.
+
+The queue is bounded, and producers wait while it's full. A client that stops
+reading shows up as a send that doesn't complete within `stall_secs`. Under
+the "close" policy its socket is closed. Under "drop", its queued audio is
+discarded so it resumes with fresh audio once it catches up.
+
+With an encoder (Opus calls), audio is encoded as it's queued, and each packet
+is paced by the duration of one encoder frame. The encoder holds back samples
+short of a whole frame until the reply ends (end_audio, also done by
+wait_played), so a reply's audio is never broken up by padding.
+"""
+
+import asyncio
+import json
+import time
+from typing import Callable, Optional
+
+from aiohttp import WSCloseCode, web
+from loguru import logger
+
+STALL_POLICIES = ("close", "drop")
+
+
+class Downlink:
+    """Paced, bounded send queue for one call's WebSocket."""
+
+    def __init__(
+        self,
+        ws: web.WebSocketResponse,
+        call_id: str,
+        *,
+        sample_rate: int = 16000,
+        frame_ms: int = 40,
+        lead_secs: float = 0.3,
+        max_items: int = 64,
+        stall_secs: float = 5.0,
+        stall_policy: str = "close",
+        on_audio_sent: Optional[Callable[[], None]] = None,
+        encoder=None,
+    ):
+        """
+        Args:
+            ws: The call's socket
+            call_id: For logs
+            sample_rate: Rate of the 16-bit mono PCM being sent
+            frame_ms: Audio is queued and paced in frames of this length
+            lead_secs: How far ahead of playback the client is kept
+            max_items: Queue bound (frames plus control messages)
+            stall_secs: A send taking longer than this means the client stalled
+            stall_policy: "close" the socket or "drop" queued audio on a stall
+            on_audio_sent: Called after each audio frame is written
+            encoder: Encodes PCM to fixed-duration packets (e.g. OpusEncoder), with flush() and reset()
+        """
+        if stall_policy not in STALL_POLICIES:
+            raise ValueError(f"stall_policy must be one of {STALL_POLICIES}, not {stall_policy!r}")
+        self._ws = ws
+        self._call_id = call_id
+        self._bytes_per_sec = sample_rate * 2
+        self._frame_bytes = max(2, int(sample_rate * frame_ms / 1000) * 2)
+        self._lead = lead_secs
+        self._stall_secs = stall_secs
+        self._stall_policy = stall_policy
+        self._on_audio_sent = on_audio_sent
+        self._encoder = encoder
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_items)
+        self._queued_frames = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._play_end = 0.0  # monotonic time the client finishes playing what it was sent
+        self._flushes = 0
+
+        # Instrumentation
+        self.sent_frames = 0
+        self.dropped_frames = 0
+        self.stalls = 0
+
+    async def send_audio(self, audio: bytes):
+        """Queue 16-bit PCM, split into frames (waits while the queue is full)."""
+        if self._encoder:
+            for packet in self._encoder.encode(audio):
+                await self._put_audio(packet, self._encoder.frame_secs)
+            return
+        for start in range(0, len(audio), self._frame_bytes):
+            frame = audio[start:start + self._frame_bytes]
+            await self._put_audio(frame, len(frame) / self._bytes_per_sec)
+
+    async def end_audio(self):
+        """End of a reply: send what the encoder held back, padded to a whole frame."""
+        if self._encoder:
+            for packet in self._encoder.flush():
+                await self._put_audio(packet, self._encoder.frame_secs)
+
+    async def send_encoded(self, packets: list[bytes]):
+        """Queue frames already encoded by a matching encoder (e.g. a cached clip)."""
+        await self.end_audio()  # anything held back plays first
+        secs = self._frame_bytes / self._bytes_per_sec
+        for packet in packets:
+            await self._put_audio(packet, secs)
+
+    async def _put_audio(self, payload: bytes, secs: float):
+        await self._queue.put((payload, secs))
+        self._queued_frames += 1
+        self._drained.clear()
+
+    async def send_control(self, data: dict):
+        """Queue a JSON control message, in order with the audio."""
+        await self._queue.put(data)
+
+    def flush_audio(self) -> int:
+        """Drop audio not yet sent, keeping control messages. Returns frames dropped."""
+        kept, dropped = [], 0
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if isinstance(item, tuple):
+                dropped += 1
+            else:
+                kept.append(item)
+        for item in kept:
+            self._queue.put_nowait(item)
+        if self._encoder:
+            self._encoder.reset()
+        self._flushes += 1
+        self._queued_frames = 0
+        self._drained.set()
+        self.dropped_frames += dropped
+        # What the client already buffered is flushed on its side, so playback restarts now
+        self._play_end = time.monotonic()
+        return dropped
+
+    async def wait_played(self):
+        """End the audio, then wait until it's all sent and the client should have played it."""
+        await self.end_audio()
+        while self._queued_frames:
+            await self._drained.wait()
+        while (remaining := self._play_end - time.monotonic()) > 0:
+            await asyncio.sleep(remaining)
+
+    async def run(self):
+        """Send queued items until the socket closes or the client stalls out."""
+        while True:
+            item = await self._queue.get()
+            if self._ws.closed:
+                return
+            if isinstance(item, tuple):
+                payload, secs = item
+                flushes = self._flushes
+                ahead = self._play_end - time.monotonic()
+                if ahead > self._lead:
+                    await asyncio.sleep(ahead - self._lead)
+                if flushes != self._flushes:
+                    continue  # dropped by a flush while waiting its turn
+                self._queued_frames -= 1
+                if not await self._send(self._ws.send_bytes(payload)):
+                    return
+                self._play_end = max(self._play_end, time.monotonic()) + secs
+                self.sent_frames += 1
+                if not self._queued_frames:
+                    self._drained.set()
+                if self._on_audio_sent:
+                    self._on_audio_sent()
+            elif not await self._send(self._ws.send_str(json.dumps(item))):
+                return
+
+    async def _send(self, write) -> bool:
+        """Write to the socket, applying the stall policy. False once the client is gone."""
+        send = asyncio.ensure_future(write)
+        try:
+            # asyncio.wait, not wait_for(shield(...)): on 3.11 that can swallow our own
+            # cancellation when the send completes at the same moment, leaving run() alive
+            done, _ = await asyncio.wait({send}, timeout=self._stall_secs)
+            if not done:
+                self.stalls += 1
+                if self._stall_policy == "close":
+                    logger.warning(f"Call {self._call_id}: client stalled for {self._stall_secs}s, closing")
+                    send.cancel()
+                    await self._ws.close(code=WSCloseCode.GOING_AWAY, message=b"client stalled")
+                    return False
+                dropped = self.flush_audio()
+                logger.warning(f"Call {self._call_id}: client stalled for {self._stall_secs}s, "
+                               f"dropped {dropped} queued frames")
+            await send  # raises the write's own error
+        except ConnectionResetError:
+            return False
+        finally:
+            send.cancel()  # no-op once done; stops a write left behind by cancellation
+        return True
@@ -2,10 +2,13 @@
 
 Free text-to-speech using Microsoft Edge's TTS API.
 No API key required. Voice: en-GB-RyanNeural (British Ryan).
+
+MP3 chunks are pushed into a pooled decoder as Edge streams them, and PCM
+frames are yielded as soon as they are decoded. Stock phrases (those passed to
+prewarm) are kept in a PCM cache and served from it; conversation text never is.
 """
 
-import asyncio
-import io
+import time
 from typing import AsyncGenerator, Optional
 
 from loguru import logger
@@ -19,6 +22,9 @@ from pipecat.frames.frames import (
 )
 from pipecat.services.tts_service import TTSService
 
+from mp3_decoder import MP3DecoderPool
+from tts_cache import PCMCache, cache_key
+
 try:
     import edge_tts
 except ModuleNotFoundError:
@@ -36,24 +42,88 @@ class EdgeTTSService(TTSService):
         rate: str = "+0%",
         volume: str = "+0%",
         sample_rate: int = 16000,
+        frame_ms: int = 40,
+        decoder: Optional[MP3DecoderPool] = None,
+        cache: Optional[PCMCache] = None,
         **kwargs,
     ):
         super().__init__(sample_rate=sample_rate, **kwargs)
         self._voice = voice
         self._rate = rate
         self._volume = volume
+        self._frame_ms = frame_ms
+        self._decoder = decoder or MP3DecoderPool(sample_rate=sample_rate)
+        self._cache = cache
+        self._cacheable: set[str] = set()  # stock phrases allowed into the cache
         # Force sample rate (normally set by StartFrame in pipeline)
         self._sample_rate = sample_rate
 
+        # Time-to-first-byte stats (MP3 from Edge, PCM out of the decoder)
+        self._requests = 0
+        self._first_mp3_total = 0.0
+        self._first_pcm_total = 0.0
+        self._first_pcm_max = 0.0
+        self._first_pcm_last = 0.0
+
     def can_generate_metrics(self) -> bool:
         return True
 
+    @property
+    def frame_bytes(self) -> int:
+        """Size of each yielded PCM frame (16-bit mono)."""
+        return max(2, self.sample_rate * self._frame_ms // 1000 * 2)
+
+    def stats(self) -> dict:
+        """Average/max time to first audio, for health and metrics endpoints."""
+        done = self._requests or 1
+        return {
+            "requests": self._requests,
+            "frameMs": self._frame_ms,
+            "avgFirstMp3": round(self._first_mp3_total / done, 3),
+            "avgFirstPcm": round(self._first_pcm_total / done, 3),
+            "maxFirstPcm": round(self._first_pcm_max, 3),
+            "lastFirstPcm": round(self._first_pcm_last, 3),
+        }
+
+    def cache_stats(self) -> Optional[dict]:
+        return self._cache.stats() if self._cache else None
+
+    async def prewarm(self, phrases: list[str]):
+        """Allow phrases into the cache and synthesize them ahead of time."""
+        if not self._cache:
+            return
+        self._cacheable.update(phrase.strip() for phrase in phrases)
+        for phrase in phrases:
+            async for _ in self.run_tts(phrase, "prewarm"):
+                pass
+        logger.info(f"Edge TTS cache pre-warmed with {len(phrases)} phrases")
+
     async def run_tts(self, text: str, context_id: str) -> AsyncGenerator[Frame, None]:
-        """Synthesize text to speech using Edge TTS."""
+        """Synthesize text to speech using Edge TTS, streaming PCM as it decodes."""
+        key = None
+        if self._cache and text.strip() in self._cacheable:
+            key = cache_key(text, self._voice, self._rate, self._volume, self.sample_rate)
+            cached = await self._cache.get(key)
+            if cached:
+                logger.debug(f"Edge TTS cache hit: [{text[:50]}...]")
+                yield TTSStartedFrame()
+                for i in range(0, len(cached), self.frame_bytes):
+                    yield TTSAudioRawFrame(
+                        audio=cached[i:i + self.frame_bytes],
+                        sample_rate=self.sample_rate,
+                        num_channels=1,
+                    )
+                yield TTSStoppedFrame()
+                return
+
         logger.debug(f"Edge TTS generating: [{text[:50]}...]")
 
+        await self.start_ttfb_metrics()
         await self.start_processing_metrics()
 
+        request_start = time.monotonic()
+        started = False
+        synthesized = bytearray() if key else None
         try:
             communicate = edge_tts.Communicate(
                 text,
@@ -62,71 +132,66 @@ class EdgeTTSService(TTSService):
                 volume=self._volume,
             )
 
-            # Collect audio data
-            audio_data = bytearray()
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_data.extend(chunk["data"])
-
-            if not audio_data:
+            # Edge TTS returns MP3 — decode to PCM while it is still streaming
+            first_mp3 = []
+            pcm_stream = self._decoder.stream(self._mp3_chunks(communicate, request_start, first_mp3))
+            async for audio in self._frames(pcm_stream):
+                if not started:
+                    started = True
+                    await self.stop_ttfb_metrics()
+                    self._record_first_audio(request_start, first_mp3)
+                    yield TTSStartedFrame()
+                if synthesized is not None:
+                    synthesized.extend(audio)
+                yield TTSAudioRawFrame(
+                    audio=audio,
+                    sample_rate=self.sample_rate,
+                    num_channels=1,
+                )
+
+            if started:
+                if synthesized:
+                    await self._cache.put(key, bytes(synthesized))
+                yield TTSStoppedFrame()
+            else:
                 logger.warning("Edge TTS returned no audio")
                 yield ErrorFrame("Edge TTS returned no audio")
-                return
-
-            # Edge TTS returns MP3 — convert to PCM
-            pcm_data = await self._mp3_to_pcm(bytes(audio_data))
-
-            if pcm_data:
-                yield TTSStartedFrame()
-                # Send in chunks for streaming feel
-                chunk_size = max(1, self.sample_rate * 2)  # 1 second chunks (16-bit = 2 bytes/sample)
-                for i in range(0, len(pcm_data), chunk_size):
-                    chunk = pcm_data[i:i + chunk_size]
-                    if chunk:
-                        yield TTSAudioRawFrame(
-                            audio=chunk,
-                            sample_rate=self.sample_rate,
-                            num_channels=1,
-                        )
-                yield TTSStoppedFrame()
 
         except Exception as e:
             logger.error(f"Edge TTS error: {e}")
             import traceback
             traceback.print_exc()
+            if started:
+                yield TTSStoppedFrame()
             yield ErrorFrame(f"Edge TTS error: {e}")
         finally:
             await self.stop_processing_metrics()
 
-    async def _mp3_to_pcm(self, mp3_data: bytes) -> Optional[bytes]:
-        """Convert MP3 audio to 16-bit PCM at target sample rate."""
-        try:
-            import subprocess
-
-            # Use ffmpeg to convert MP3 → raw PCM
-            proc = await asyncio.create_subprocess_exec(
-                "ffmpeg",
-                "-i", "pipe:0",
-                "-f", "s16le",
-                "-acodec", "pcm_s16le",
-                "-ar", str(self.sample_rate),
-                "-ac", "1",
-                "pipe:1",
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            pcm_data, stderr = await proc.communicate(input=mp3_data)
-
-            if proc.returncode != 0:
-                logger.error(f"ffmpeg error: {stderr.decode()[:200]}")
-                return None
-
-            return pcm_data
-
-        except FileNotFoundError:
-            logger.error("ffmpeg not found. Install with: apt install ffmpeg")
-            return None
-        except Exception as e:
-            logger.error(f"MP3 to PCM conversion error: {e}")
-            return None
+    def _record_first_audio(self, request_start: float, first_mp3: list):
+        first_pcm = time.monotonic() - request_start
+        self._requests += 1
+        self._first_mp3_total += first_mp3[0] if first_mp3 else first_pcm
+        self._first_pcm_total += first_pcm
+        self._first_pcm_max = max(self._first_pcm_max, first_pcm)
+        self._first_pcm_last = first_pcm
+        logger.debug(f"Edge TTS first PCM after {first_pcm * 1000:.0f}ms")
+
+    async def _frames(self, pcm_stream: AsyncGenerator[bytes, None]) -> AsyncGenerator[bytes, None]:
+        """Re-chunk decoded PCM into frame_bytes frames (last one may be short)."""
+        pending = bytearray()
+        frame_bytes = self.frame_bytes
+        async for pcm in pcm_stream:
+            pending.extend(pcm)
+            while len(pending) >= frame_bytes:
+                yield bytes(pending[:frame_bytes])
+                del pending[:frame_bytes]
+        if pending:
+            yield bytes(pending)
+
+    async def _mp3_chunks(self, communicate, request_start: float, first_mp3: list):
+        """MP3 audio chunks from Edge, noting when the first one arrived."""
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                if not first_mp3:
+                    first_mp3.append(time.monotonic() - request_start)
+                yield chunk["data"]
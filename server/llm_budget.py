@@ -0,0 +1,68 @@
+"""Per-turn latency budget for the OpenClaw reply.
+
+A turn waits silently in "thinking" until its reply is ready to speak. Once
+that wait passes `filler_secs`, a short filler clip ("One moment, sir.")
+plays once, so a slow turn doesn't sound like a dropped call. At
+`deadline_secs` the request is cancelled, and the caller plays an apology.
+
+Counts of turns, fillers and deadlines are kept for the health and metrics
+endpoints.
+"""
+
+import asyncio
+from typing import Awaitable, Callable
+
+
+class LLMBudget:
+    """Times one wait per turn: filler past the soft threshold, give up at the deadline."""
+
+    def __init__(self, filler_secs: float = 2.5, deadline_secs: float = 20.0):
+        """
+        Args:
+            filler_secs: Wait before a filler clip plays (0 = never)
+            deadline_secs: Wait before the request is cancelled (0 = no deadline)
+        """
+        self._filler_secs = filler_secs
+        self._deadline_secs = deadline_secs
+        self._turns = 0
+        self._fillers = 0
+        self._deadlines = 0
+
+    @property
+    def filler_enabled(self) -> bool:
+        return self._filler_secs > 0 and (not self._deadline_secs or self._filler_secs < self._deadline_secs)
+
+    def stats(self) -> dict:
+        turns = self._turns or 1
+        return {
+            "fillerSecs": self._filler_secs,
+            "deadlineSecs": self._deadline_secs,
+            "turns": self._turns,
+            "fillers": self._fillers,
+            "deadlines": self._deadlines,
+            "fillerRate": round(self._fillers / turns, 3),
+            "deadlineRate": round(self._deadlines / turns, 3),
+        }
+
+    async def wait(self, reply: asyncio.Future, play_filler: Callable[[], Awaitable[bool]]) -> bool:
+        """Wait for `reply`, playing a filler if it's slow.
+
+        `play_filler` returns whether a clip was actually queued; only those are counted.
+
+        Returns False if the deadline passed, after cancelling `reply`. If this
+        wait is cancelled itself (barge-in), `reply` is left to the caller.
+        """
+        self._turns += 1
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        if self.filler_enabled:
+            done, _ = await asyncio.wait([reply], timeout=self._filler_secs)
+            if not done and await play_filler():
+                self._fillers += 1
+        timeout = max(0.0, self._deadline_secs - (loop.time() - start)) if self._deadline_secs else None
+        done, _ = await asyncio.wait([reply], timeout=timeout)
+        if done:
+            return True
+        self._deadlines += 1
+        reply.cancel()
+        return False
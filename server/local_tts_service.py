@@ -0,0 +1,135 @@
+"""Local CPU text-to-speech with Piper, for when Edge TTS is slow or down.
+
+Runs fully offline from a Piper voice model (.onnx plus its .onnx.json).
+Synthesis runs on a worker thread, one sentence at a time, and PCM frames are
+yielded as each sentence finishes. Output is resampled from the voice's rate
+to the pipeline's.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, Iterator
+
+import numpy as np
+from loguru import logger
+
+from pipecat.frames.frames import (
+    ErrorFrame,
+    Frame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.services.tts_service import TTSService
+
+
+class PiperTTSService(TTSService):
+    """Text-to-speech with a local Piper voice (CPU, no network)."""
+
+    def __init__(
+        self,
+        *,
+        model_path: str,
+        sample_rate: int = 16000,
+        frame_ms: int = 40,
+        workers: int = 1,
+        **kwargs,
+    ):
+        """
+        Args:
+            model_path: Piper voice (.onnx, with its .onnx.json next to it)
+            sample_rate: Output PCM rate
+            frame_ms: Size of each yielded PCM frame
+            workers: Concurrent syntheses
+        """
+        from piper import PiperVoice
+
+        super().__init__(sample_rate=sample_rate, **kwargs)
+        self._sample_rate = sample_rate
+        self._frame_ms = frame_ms
+        self._voice = PiperVoice.load(model_path)
+        self._voice_rate = self._voice.config.sample_rate
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="piper")
+        logger.info(f"Piper TTS loaded: {model_path} ({self._voice_rate} Hz)")
+
+    @property
+    def frame_bytes(self) -> int:
+        """Size of each yielded PCM frame (16-bit mono)."""
+        return max(2, self.sample_rate * self._frame_ms // 1000 * 2)
+
+    def warm_up(self):
+        """Synthesize a short phrase (blocking), so the first reply doesn't pay for cold caches."""
+        for _ in self._synthesize("Hello."):
+            pass
+
+    async def run_tts(self, text: str, context_id: str) -> AsyncGenerator[Frame, None]:
+        """Synthesize text, yielding PCM frames sentence by sentence."""
+        logger.debug(f"Piper TTS generating: [{text[:50]}...]")
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def synthesize():
+            try:
+                for pcm in self._synthesize(text):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, pcm)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        job = loop.run_in_executor(self._executor, synthesize)
+        started = False
+        pending = b""
+        try:
+            while (chunk := await chunks.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if not started:
+                    started = True
+                    yield TTSStartedFrame()
+                pending += chunk
+                usable = len(pending) - len(pending) % self.frame_bytes
+                for i in range(0, usable, self.frame_bytes):
+                    yield TTSAudioRawFrame(audio=pending[i:i + self.frame_bytes],
+                                           sample_rate=self.sample_rate, num_channels=1)
+                pending = pending[usable:]
+            if pending:
+                yield TTSAudioRawFrame(audio=pending, sample_rate=self.sample_rate, num_channels=1)
+            if started:
+                yield TTSStoppedFrame()
+            else:
+                yield ErrorFrame("Piper TTS returned no audio")
+        except Exception as e:
+            logger.error(f"Piper TTS error: {e}")
+            if started:
+                yield TTSStoppedFrame()
+            yield ErrorFrame(f"Piper TTS error: {e}")
+        finally:
+            # Cancelled (barge-in, or another engine won): stop after the current sentence
+            stop.set()
+            job.cancel()
+
+    def _synthesize(self, text: str) -> Iterator[bytes]:
+        """Runs on a Piper thread: 16-bit PCM at the output rate, per sentence."""
+        import av
+
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=self.sample_rate)
+        for pcm in self._voice_chunks(text):
+            frame = av.AudioFrame.from_ndarray(
+                np.frombuffer(pcm, dtype=np.int16)[None, :], format="s16", layout="mono",
+            )
+            frame.sample_rate = self._voice_rate
+            yield b"".join(f.to_ndarray().tobytes() for f in resampler.resample(frame))
+        yield b"".join(f.to_ndarray().tobytes() for f in resampler.resample(None))
+
+    def _voice_chunks(self, text: str) -> Iterator[bytes]:
+        """Raw PCM per sentence at the voice's rate, across piper-tts API versions."""
+        if hasattr(self._voice, "synthesize_stream_raw"):
+            yield from self._voice.synthesize_stream_raw(text)
+        else:
+            for chunk in self._voice.synthesize(text):
+                yield chunk.audio_int16_bytes
@@ -9,14 +9,24 @@ import ssl
 import json
 import time
 import wave
+from contextlib import aclosing
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import AsyncGenerator, Awaitable, Optional
 
+import numpy as np
 from aiohttp import web
 from dotenv import load_dotenv
 from loguru import logger
 
-import numpy as np
-from call_state import CallManager, CallState
+from call_state import CallManager, CallRecord, CallState
+from downlink import Downlink
+from metrics import TURN_STAGES, LoopLagMonitor, MetricsRegistry, TurnTimeline
+from llm_budget import LLMBudget
+from openclaw_llm import OpenClawClient, OpenClawError
+from opus_codec import OpusDecoder, OpusEncoder, OpusUnavailable, check_opus, encode_clip
+from sentence_segmenter import SentenceSegmenter
+from speech_buffer import SpeechBuffer
 
 load_dotenv()
 
@@ -29,30 +39,176 @@ OPENCLAW_URL = os.getenv("OPENCLAW_URL", "")
 OPENCLAW_TOKEN = os.getenv("OPENCLAW_TOKEN", "")
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "tiny")
 VAD_STOP_SECS = float(os.getenv("VAD_STOP_SECS", "0.6"))
+VAD_START_SECS = float(os.getenv("VAD_START_SECS", "0.3"))
+VAD_CONFIDENCE = float(os.getenv("VAD_CONFIDENCE", "0.6"))
+VAD_MIN_VOLUME = float(os.getenv("VAD_MIN_VOLUME", "0.4"))
+VAD_PREROLL_SECS = float(os.getenv("VAD_PREROLL_SECS", "0.3"))  # audio kept from before speech was detected
+VAD_BATCH_TICK_MS = float(os.getenv("VAD_BATCH_TICK_MS", "10"))  # batch all calls' VAD windows per tick (0 = per call, inline)
+VAD_MAX_BATCH = int(os.getenv("VAD_MAX_BATCH", "64"))
 MAX_CALL_DURATION_MIN = int(os.getenv("MAX_CALL_DURATION_MIN", "30"))
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", "4"))
+OPENCLAW_TIMEOUT = float(os.getenv("OPENCLAW_TIMEOUT", "60"))  # deadline per request (seconds)
+OPENCLAW_RETRIES = int(os.getenv("OPENCLAW_RETRIES", "2"))  # retries for connection errors / 502-504
+STT_WORKERS = int(os.getenv("STT_WORKERS", "0"))  # 0 = sized to CPU cores
+STT_MAX_QUEUE = int(os.getenv("STT_MAX_QUEUE", "32"))
+STT_SEGMENT_PAUSE_SECS = float(os.getenv("STT_SEGMENT_PAUSE_SECS", "0.3"))  # mid-utterance pause that closes a segment
+STT_MAX_SEGMENT_SECS = float(os.getenv("STT_MAX_SEGMENT_SECS", "20"))  # force a segment cut for non-stop talkers
+STT_MAX_GAP_SECS = float(os.getenv("STT_MAX_GAP_SECS", "0.3"))  # longer pauses are shortened before Whisper
+STT_BATCH_WINDOW_MS = float(os.getenv("STT_BATCH_WINDOW_MS", "0"))  # gather utterances for one batched decode (0 = off)
+STT_MAX_BATCH = int(os.getenv("STT_MAX_BATCH", "8"))
+# Speculative turn start while VAD is still counting stop_secs: off | stt | llm
+# ("llm" also sends the OpenClaw request early; a discarded request may still reach the session)
+SPECULATIVE_TURN = os.getenv("SPECULATIVE_TURN", "off").lower()
+SPECULATIVE_AFTER_SECS = float(os.getenv("SPECULATIVE_AFTER_SECS", "0.2"))  # silence before speculating
+TTS_FRAME_MS = int(os.getenv("TTS_FRAME_MS", "40"))  # PCM frame size sent as soon as it's decoded
+MP3_DECODER = os.getenv("MP3_DECODER", "auto")  # auto | pyav | ffmpeg
+OPUS_BITRATE = int(os.getenv("OPUS_BITRATE", "24000"))  # for calls that negotiate codec "opus"
+OPUS_FRAME_MS = int(os.getenv("OPUS_FRAME_MS", "40"))  # 10 | 20 | 40 | 60
+MP3_DECODER_POOL = int(os.getenv("MP3_DECODER_POOL", "4"))  # max concurrent TTS decodes
+TTS_CACHE_MB = float(os.getenv("TTS_CACHE_MB", "32"))  # in-memory PCM cache for repeated phrases
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "")  # optional on-disk tier
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "64"))  # bound on the on-disk tier
+TTS_PREWARM = [p.strip() for p in os.getenv("TTS_PREWARM", "").split("|") if p.strip()]  # extra phrases
+TTS_ENGINE = os.getenv("TTS_ENGINE", "edge").lower()  # edge | local
+LOCAL_TTS_MODEL = os.getenv("LOCAL_TTS_MODEL", "")  # Piper voice (.onnx); with edge, it's the fallback
+TTS_BUDGET_MS = float(os.getenv("TTS_BUDGET_MS", "800"))  # Edge time to first audio before the local engine joins in
+UPLINK_QUEUE_FRAMES = 32  # client audio frames buffered ahead of VAD before the socket is held back
+DOWNLINK_QUEUE_ITEMS = 64  # audio frames / control messages buffered ahead of the socket
+DOWNLINK_LEAD_MS = float(os.getenv("DOWNLINK_LEAD_MS", "300"))  # audio sent ahead of the client's playback
+DOWNLINK_STALL_SECS = float(os.getenv("DOWNLINK_STALL_SECS", "5"))  # a send blocked this long means a stalled client
+DOWNLINK_STALL_POLICY = os.getenv("DOWNLINK_STALL_POLICY", "close")  # close | drop (queued audio)
+TURN_QUEUE_SIZE = 2  # endpointed utterances waiting behind the reply in progress
+CALL_TEARDOWN_SECS = 2.0  # a call's tasks get this long to finish cancelling before they're abandoned
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") not in ("0", "false", "no")  # SSE + sentence-by-sentence TTS
+LLM_FILLER_MS = float(os.getenv("LLM_FILLER_MS", "2500"))  # no reply yet: play a filler clip (0 = never)
+LLM_DEADLINE_SECS = float(os.getenv("LLM_DEADLINE_SECS", "30"))  # no reply yet: cancel and apologize (0 = no deadline)
+LLM_FILLERS = [p.strip() for p in os.getenv(
+    "LLM_FILLERS", "One moment, sir.|Let me check on that.|Bear with me, sir.|Just a second."
+).split("|") if p.strip()]  # rotated per call, rendered once at startup
+MAX_VOICE_CHARS = 255  # longer replies: voice a summary, full text to WhatsApp
+WHATSAPP_SUFFIX = "Sent the details to WhatsApp."
+LLM_ERROR_REPLY = "I'm sorry, I couldn't process that. Could you try again?"
+LLM_UNREACHABLE_REPLY = "I'm having trouble connecting. Please try again in a moment."
+LLM_DEADLINE_REPLY = "I'm sorry sir, that's taking too long. Please try again."
 WEB_DIR = Path(__file__).parent.parent / "web"
 SOUNDS_DIR = Path(__file__).parent / "sounds"
 SAMPLE_RATE = 16000
 
 # ── Call Manager ────────────────────────────────────────────────
-call_manager = CallManager(max_duration_min=MAX_CALL_DURATION_MIN)
-
-# ── Pre-load Models (once at startup, not per-call) ────────────
-logger.info("Pre-loading Pipecat models...")
-from pipecat.audio.vad.silero import SileroVADAnalyzer
+call_manager = CallManager(
+    max_duration_min=MAX_CALL_DURATION_MIN,
+    max_concurrent_calls=MAX_CONCURRENT_CALLS,
+)
+
+# ── OpenClaw Client (one keep-alive pool for the app) ──────────
+openclaw = OpenClawClient(
+    OPENCLAW_URL,
+    OPENCLAW_TOKEN,
+    timeout=OPENCLAW_TIMEOUT,
+    retries=OPENCLAW_RETRIES,
+)
+
+# ── Reply budget (filler clip when slow, apology at the deadline) ──
+llm_budget = LLMBudget(
+    filler_secs=LLM_FILLER_MS / 1000 if LLM_FILLERS else 0,
+    deadline_secs=LLM_DEADLINE_SECS,
+)
+
+# ── Models (each loaded once, then warmed up, by load_models at startup) ──
 from pipecat.audio.vad.vad_analyzer import VADParams, VADState
-from pipecat.services.whisper.stt import WhisperSTTService, Model
-from pipecat.frames.frames import TranscriptionFrame, TTSAudioRawFrame
+from pipecat.frames.frames import TTSAudioRawFrame
 from edge_tts_service import EdgeTTSService
+from model_registry import ModelRegistry, resident_bytes
+from mp3_decoder import DecoderUnavailable, MP3DecoderPool
+from whatsapp_forwarder import WhatsAppForwarder
+from tts_cache import PCMCache
+from tts_router import TTSRouter
+from vad_engine import CallVAD, SileroModel, VADEngine
+from stt_engine import IncrementalTranscript, STTEngine, STTQueueFull, STTResult
+
+models = ModelRegistry()
+# One Silero session for every call; calls keep only their recurrent state
+models.register("silero", lambda: SileroModel(SAMPLE_RATE), SileroModel.warm_up)
+# Direct faster-whisper replicas behind a fair job queue (beam_size=1)
+models.register("whisper", lambda: STTEngine(
+    WHISPER_MODEL,
+    workers=STT_WORKERS,
+    max_queue=STT_MAX_QUEUE,
+    no_speech_prob=0.4,
+    batch_window=STT_BATCH_WINDOW_MS / 1000,
+    max_batch=STT_MAX_BATCH,
+), STTEngine.warm_up)
+if LOCAL_TTS_MODEL:
+    from local_tts_service import PiperTTSService
+    models.register("piper", lambda: PiperTTSService(
+        model_path=LOCAL_TTS_MODEL, sample_rate=SAMPLE_RATE, frame_ms=TTS_FRAME_MS,
+    ), PiperTTSService.warm_up)
+elif TTS_ENGINE == "local":
+    raise SystemExit("TTS_ENGINE=local needs LOCAL_TTS_MODEL (a Piper voice .onnx)")
+
+_vad_engine: Optional[VADEngine] = None  # built once Silero is loaded (with VAD batching on)
+_mp3_decoder = MP3DecoderPool(sample_rate=SAMPLE_RATE, size=MP3_DECODER_POOL, backend=MP3_DECODER)
+_edge_tts = None
+if TTS_ENGINE != "local":
+    _edge_tts = EdgeTTSService(
+        voice="en-GB-RyanNeural",
+        sample_rate=SAMPLE_RATE,
+        frame_ms=TTS_FRAME_MS,
+        decoder=_mp3_decoder,
+        cache=PCMCache(
+            max_bytes=int(TTS_CACHE_MB * 1024 * 1024),
+            disk_dir=Path(TTS_CACHE_DIR) if TTS_CACHE_DIR else None,
+            max_disk_bytes=int(TTS_CACHE_DISK_MB * 1024 * 1024),
+        ),
+    )
+_shared_tts: Optional[TTSRouter] = None  # built once the local voice (if any) is loaded
+
 
-_shared_stt = WhisperSTTService(model=WHISPER_MODEL, device="cpu", compute_type="int8", no_speech_prob=0.4)
+def build_tts() -> TTSRouter:
+    """Edge first, hedged with the local engine past the budget; or the local engine alone."""
+    local = models.get("piper") if "piper" in models else None
+    return TTSRouter(
+        _edge_tts or local, "edge" if _edge_tts else "local",
+        local if _edge_tts else None, "local",
+        budget_secs=TTS_BUDGET_MS / 1000,
+        on_first_audio=lambda engine, secs: tts_first_audio_seconds.observe(secs, engine),
+    )
 
-# Direct faster-whisper model for fast transcription (beam_size=1)
-from faster_whisper import WhisperModel as _FWModel
-_fast_whisper = _FWModel(WHISPER_MODEL, device="cpu", compute_type="int8")
-logger.info("Fast Whisper (beam=1) loaded ✓")
-_shared_tts = EdgeTTSService(voice="en-GB-RyanNeural", sample_rate=SAMPLE_RATE)
-logger.info("Models pre-loaded ✓")
+
+# ── Metrics ────────────────────────────────────────────────────
+metrics = MetricsRegistry()
+turn_stage_seconds = metrics.histogram(
+    "turn_stage_seconds", "Seconds from the VAD endpoint to each turn stage", label="stage",
+)
+turn_latency_seconds = metrics.histogram(
+    "turn_latency_seconds", "Seconds from the VAD endpoint to the first reply audio sent",
+)
+tts_first_audio_seconds = metrics.histogram(
+    "tts_first_audio_seconds", "Seconds from a TTS request to its first audio, by winning engine", label="engine",
+)
+loop_lag = LoopLagMonitor()
+metrics.gauge("active_calls", "Calls in progress", lambda: call_manager.active_count)
+metrics.gauge("ready", "1 once every model is loaded and warmed up", lambda: int(models.ready))
+metrics.gauge("resident_memory_bytes", "Resident memory of the server process", resident_bytes)
+metrics.gauge("stt_queue_depth", "STT jobs waiting for a worker",
+              lambda: stt.stats()["queueDepth"] if (stt := models.peek("whisper")) else 0)
+if VAD_BATCH_TICK_MS > 0:
+    metrics.gauge("vad_batch_size", "Average streams per batched VAD inference",
+                  lambda: _vad_engine.stats()["avgBatch"] if _vad_engine else 0)
+metrics.counter("llm_waits_total", "Turns that waited on an OpenClaw reply", lambda: llm_budget.stats()["turns"])
+metrics.counter("llm_fillers_total", "Filler clips played while a reply was slow", lambda: llm_budget.stats()["fillers"])
+metrics.counter("llm_deadlines_total", "Replies cancelled at the deadline", lambda: llm_budget.stats()["deadlines"])
+metrics.gauge("event_loop_lag_seconds", "How late the event loop ran a periodic timer", lambda: round(loop_lag.lag, 6))
+
+
+def record_turn(timeline: TurnTimeline):
+    """Add a finished turn's stage timings to the histograms."""
+    offsets = timeline.offsets()
+    for stage in TURN_STAGES:
+        if stage in offsets:
+            turn_stage_seconds.observe(offsets[stage], stage)
+    if "first_audio_sent" in offsets:
+        turn_latency_seconds.observe(offsets["first_audio_sent"])
 
 
 def get_greeting_key(timezone: str = "UTC") -> str:
@@ -94,240 +250,597 @@ GREETINGS = {
     for key in ["morning", "afternoon", "evening", "night"]
 }
 
+# Opus calls get the same sounds pre-encoded, so they're never encoded per call
+try:
+    check_opus()
+    OPUS_CLIPS = {
+        name: encode_clip(pcm, SAMPLE_RATE, OPUS_FRAME_MS, OPUS_BITRATE)
+        for name, pcm in [("ring", RING_AUDIO), ("pickup", PICKUP_AUDIO), *GREETINGS.items()]
+    }
+    OPUS_AVAILABLE = True
+except OpusUnavailable as e:
+    logger.warning(f"Opus transport disabled: {e}")
+    OPUS_CLIPS = {}
+    OPUS_AVAILABLE = False
+
+# Filler and apology clips need the TTS, so they're rendered at startup (render_clips)
+FILLER_NAMES = [f"filler-{i}" for i in range(len(LLM_FILLERS))]
+RENDERED_CLIPS: dict[str, bytes] = {}
+CLIP_RETRY_SECS = 5.0  # first retry for clips that failed to render (doubles, up to 5 minutes)
+
+
+async def render_clips():
+    """Synthesize the filler and apology clips in the call voice, as PCM (and Opus).
+
+    Clips that fail (TTS unreachable at startup) are retried with backoff until all are rendered.
+    """
+    phrases = {**dict(zip(FILLER_NAMES, LLM_FILLERS)), "deadline": LLM_DEADLINE_REPLY}
+    delay = CLIP_RETRY_SECS
+    while True:
+        for name, text in phrases.items():
+            if name in RENDERED_CLIPS:
+                continue
+            try:
+                async with aclosing(_shared_tts.run_tts(text, "clip")) as frames:
+                    pcm = b"".join([frame.audio async for frame in frames if isinstance(frame, TTSAudioRawFrame)])
+            except Exception as e:
+                logger.warning(f"Clip {name!r} failed to render: {e}")
+                continue
+            if not pcm:
+                continue
+            if OPUS_AVAILABLE:
+                OPUS_CLIPS[name] = encode_clip(pcm, SAMPLE_RATE, OPUS_FRAME_MS, OPUS_BITRATE)
+            RENDERED_CLIPS[name] = pcm
+        missing = len(phrases) - len(RENDERED_CLIPS)
+        if not missing:
+            break
+        logger.warning(f"{missing}/{len(phrases)} filler and apology clips not rendered, retrying in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 300.0)
+    logger.info(f"Rendered {len(RENDERED_CLIPS)} filler and apology clips")
+
+
+# ── Call Session ───────────────────────────────────────────────
+BYTES_PER_SEC = SAMPLE_RATE * 2  # 16kHz * 16-bit = 32000 bytes/sec
+MIN_SEGMENT_SAMPLES = SAMPLE_RATE  # don't cut segments shorter than 1s
+MAX_SEGMENT_SAMPLES = int(STT_MAX_SEGMENT_SECS * SAMPLE_RATE)
+MIN_UTTERANCE_SAMPLES = SAMPLE_RATE // 2  # shorter speech (pre-roll and final silence excluded) is ignored
+
+
+# Live VAD tuning from the client: param → (camelCase key, min, max)
+VAD_PARAM_LIMITS = {
+    "stop_secs": ("stopSecs", 0.5, 15.0),
+    "start_secs": ("startSecs", 0.05, 2.0),
+    "confidence": ("confidence", 0.0, 1.0),
+    "min_volume": ("minVolume", 0.0, 1.0),
+}
 
-# ── Pipecat Pipeline ───────────────────────────────────────────
-async def run_pipeline(ws: web.WebSocketResponse, timezone: str = "UTC"):
-    """Run the voice pipeline for a single call."""
-
-    # ── Start call ──
-    call = call_manager.start_call()
-    call_manager.transition(CallState.RINGING)
-
-    # Send ring sound
-    await send_audio(ws, RING_AUDIO)
-    await asyncio.sleep(0.1)
-
-    # Send pickup + greeting
-    call_manager.transition(CallState.ANSWERED)
-    await send_audio(ws, PICKUP_AUDIO)
-    await asyncio.sleep(0.05)
-
-    greeting_key = get_greeting_key(timezone)
-    greeting_audio = GREETINGS.get(greeting_key, b"")
-    if greeting_audio:
-        call_manager.transition(CallState.ACTIVE)
-        call_manager.transition(CallState.SPEAKING)
-        await send_control(ws, {"type": "state", "state": "speaking"})
-        await send_audio(ws, greeting_audio)
-        call_manager.add_transcript("bot", f"Good {greeting_key} sir.")
-
-    call_manager.transition(CallState.LISTENING)
-    await send_control(ws, {"type": "state", "state": "listening"})
-
-    # ── Services (shared, pre-loaded at startup) ──
-    # VAD is lightweight and stateful per-call, so create fresh
-    current_vad_stop = VAD_STOP_SECS
-    vad = SileroVADAnalyzer(sample_rate=SAMPLE_RATE, params=VADParams(
-        stop_secs=current_vad_stop,
-        start_secs=0.3,
-        confidence=0.6,
-        min_volume=0.4,
-    ))
-    vad.set_sample_rate(SAMPLE_RATE)
-    logger.info(f"Call {call.call_id}: VAD params: stop={vad.params.stop_secs}s start={vad.params.start_secs}s conf={vad.params.confidence}")
 
-    # STT and TTS are shared (models loaded once)
-    stt = _shared_stt
-    tts = _shared_tts
+def create_vad() -> CallVAD:
+    """Per-call VAD state on the shared Silero model."""
+    return CallVAD(models.get("silero"), VADParams(
+        stop_secs=VAD_STOP_SECS,
+        start_secs=VAD_START_SECS,
+        confidence=VAD_CONFIDENCE,
+        min_volume=VAD_MIN_VOLUME,
+    ), engine=_vad_engine)
 
-    # ── Main loop: read audio from WebSocket, feed to VAD ──
-    logger.info(f"Call {call.call_id}: pipeline started")
-    speech_buffer = bytearray()
-    is_speaking = False
 
-    # Silence gap tracking: record gaps between speech segments within one utterance
-    silence_start_time = None  # when current silence gap began
-    silence_gaps = []  # list of gap durations (seconds) within this utterance
-    prev_vad_state = VADState.QUIET
+def vad_params_dict(params: VADParams) -> dict:
+    return {key: getattr(params, name) for name, (key, _, _) in VAD_PARAM_LIMITS.items()}
 
-    # Bytes per second for time calculations
-    BYTES_PER_SEC = SAMPLE_RATE * 2  # 16kHz * 16-bit = 32000 bytes/sec
 
-    try:
-        async for msg in ws:
+@dataclass
+class Turn:
+    """One endpointed utterance waiting to be answered."""
+    pending: IncrementalTranscript
+    speculation: Optional[asyncio.Task]
+    tail_audio: np.ndarray  # float32
+    silence_report: dict
+    timeline: TurnTimeline = field(default_factory=TurnTimeline)  # starts at the VAD endpoint
+
+    def cancel(self):
+        self.pending.cancel()
+        if self.speculation:
+            self.speculation.cancel()
+
+
+class CallSession:
+    """The tasks behind one call, linked by bounded queues.
+
+    receive → uplink queue → VAD → turn queue → turns → downlink (paced) → send
+
+    The receive task only reads the socket, so hangup and vad_stop take effect
+    at once, even mid-turn. Backpressure is explicit at each queue: a full
+    uplink stops reading the socket (TCP holds the client back), a full
+    downlink holds back TTS, and a full turn queue drops the new utterance.
+    """
+
+    def __init__(self, ws: web.WebSocketResponse, call: CallRecord, codec: str = "pcm"):
+        self.ws = ws
+        self.call = call
+        self.codec = codec  # "pcm" or "opus", as negotiated in the connect message
+        self._decoder = OpusDecoder(SAMPLE_RATE) if codec == "opus" else None
+        self.vad = create_vad()
+        self._uplink: asyncio.Queue = asyncio.Queue(maxsize=UPLINK_QUEUE_FRAMES)
+        self._turns: asyncio.Queue = asyncio.Queue(maxsize=TURN_QUEUE_SIZE)
+        self.downlink = Downlink(
+            ws, call.call_id,
+            sample_rate=SAMPLE_RATE,
+            frame_ms=OPUS_FRAME_MS if codec == "opus" else TTS_FRAME_MS,
+            lead_secs=DOWNLINK_LEAD_MS / 1000,
+            max_items=DOWNLINK_QUEUE_ITEMS,
+            stall_secs=DOWNLINK_STALL_SECS,
+            stall_policy=DOWNLINK_STALL_POLICY,
+            on_audio_sent=self._on_audio_sent,
+            encoder=OpusEncoder(SAMPLE_RATE, OPUS_FRAME_MS, OPUS_BITRATE) if codec == "opus" else None,
+        )
+        self._current_turn: Optional[asyncio.Task] = None
+        self._fillers_played = 0  # rotates through FILLER_NAMES
+        self.timeline: Optional[TurnTimeline] = None  # stages of the turn being answered
+
+        # VAD bookkeeping. Times are on the audio clock (seconds of uplink audio
+        # analyzed), so a backlog processed in a burst still measures real gaps.
+        self._audio_clock = 0.0
+        # Audio not yet handed to STT, marked speech/non-speech per frame
+        self._speech = SpeechBuffer(SAMPLE_RATE, preroll_secs=VAD_PREROLL_SECS, max_gap_secs=STT_MAX_GAP_SECS)
+        self._is_speaking = False
+        self._utterance: Optional[IncrementalTranscript] = None  # utterance in progress
+        self._silence_start = None  # audio time the current silence gap began
+        self._pause_offset = None  # speech buffer length (samples) when the current gap began
+        self._speculative_turn = None  # task running STT (+LLM) for the utterance as of the current gap
+        self._silence_gaps = []  # gap durations (seconds) within this utterance
+        self._prev_vad_state = VADState.QUIET
+
+    async def run(self, timezone: str = "UTC"):
+        """Run the call until hangup, disconnect or a failed task."""
+        # Open the OpenClaw connection while the phone rings
+        warm_up = asyncio.create_task(openclaw.warm())
+        tasks = [
+            asyncio.create_task(self._receive_loop()),
+            asyncio.create_task(self._vad_loop()),
+            asyncio.create_task(self._turn_loop(timezone)),
+            asyncio.create_task(self.downlink.run()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # surface a crashed task
+        finally:
+            warm_up.cancel()
+            for task in tasks:
+                task.cancel()
+            # Bounded, so one task stuck in teardown can't keep the call's slot from being freed
+            _, stuck = await asyncio.wait(tasks, timeout=CALL_TEARDOWN_SECS)
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # retrieved here; a crash was already raised above
+            if stuck:
+                logger.error(f"Call {self.call.call_id}: {len(stuck)} tasks still running "
+                             f"{CALL_TEARDOWN_SECS:g}s after cancel, abandoning them")
+            if self._current_turn:
+                self._current_turn.cancel()
+            self._drop_queued_turns()
+            if self._utterance:
+                self._utterance.cancel()
+            if self._speculative_turn:
+                self._speculative_turn.cancel()
+
+    # ── Downlink ──
+    async def send_audio(self, audio: bytes):
+        """Queue audio for the client (waits while the downlink is full)."""
+        if audio:
+            await self.downlink.send_audio(audio)
+
+    async def send_clip(self, name: str, audio: bytes):
+        """Queue a static sound, pre-encoded for Opus calls."""
+        if self.codec == "opus":
+            await self.downlink.send_encoded(OPUS_CLIPS.get(name, []))
+        else:
+            await self.send_audio(audio)
+
+    async def send_control(self, data: dict):
+        """Queue a JSON control message, in order with the audio."""
+        await self.downlink.send_control(data)
+
+    async def enter_speaking(self):
+        """Move to SPEAKING (which arms barge-in) and tell the client, if not there already."""
+        if self.call.state != CallState.SPEAKING:
+            call_manager.transition(self.call.call_id, CallState.SPEAKING)
+            await self.send_control({"type": "state", "state": "speaking"})
+
+    async def play_filler(self) -> bool:
+        """Play the next filler clip in rotation. Returns False if it isn't rendered (yet)."""
+        name = FILLER_NAMES[self._fillers_played % len(FILLER_NAMES)]
+        self._fillers_played += 1
+        if name not in RENDERED_CLIPS:
+            return False
+        logger.info(f"Call {self.call.call_id}: reply is slow, playing filler")
+        await self.enter_speaking()
+        await self.send_clip(name, RENDERED_CLIPS[name])
+        return True
+
+    def flush_audio(self) -> int:
+        """Drop audio not yet sent, keeping control messages. Returns frames dropped."""
+        return self.downlink.flush_audio()
+
+    def _on_audio_sent(self):
+        # Audio after the current turn's first TTS frame is its reply
+        if self.timeline and self.timeline.has("tts_first_pcm"):
+            self.timeline.mark("first_audio_sent")
+
+    # ── Uplink ──
+    async def _receive_loop(self):
+        call = self.call
+        async for msg in self.ws:
             if msg.type == web.WSMsgType.BINARY:
-                # Audio from client
-                audio_bytes = msg.data
-                # Feed to VAD
-                vad_state = await vad.analyze_audio(audio_bytes)
-
-                # Track silence gaps within speech
-                if prev_vad_state in (VADState.SPEAKING, VADState.STARTING) and vad_state == VADState.STOPPING:
-                    # Just went from speaking to silence — start timing the gap
-                    silence_start_time = time.time()
-                elif vad_state in (VADState.SPEAKING, VADState.STARTING) and silence_start_time is not None:
-                    # Resumed speaking after a gap — record the gap
-                    gap = time.time() - silence_start_time
-                    silence_gaps.append(gap)
-                    silence_start_time = None
-                prev_vad_state = vad_state
-
-                if vad_state == VADState.STARTING:
-                    # Speech just started
-                    if not is_speaking:
-                        is_speaking = True
-                        speech_buffer = bytearray()
-                        silence_gaps = []
-                        silence_start_time = None
-                        logger.debug(f"Call {call.call_id}: VAD speech start")
-                    speech_buffer.extend(audio_bytes)
-
-                elif vad_state == VADState.SPEAKING:
-                    # Speech continuing
-                    is_speaking = True
-                    speech_buffer.extend(audio_bytes)
-
-                elif vad_state == VADState.STOPPING:
-                    # Still counting silence — keep buffering but don't transcribe yet
-                    speech_buffer.extend(audio_bytes)
-
-                elif vad_state == VADState.QUIET and is_speaking:
-                    # Full stop_secs of silence elapsed — NOW transcribe
-                    speech_buffer.extend(audio_bytes)
-                    is_speaking = False
-                    speech_audio = bytes(speech_buffer)
-                    speech_buffer = bytearray()
-
-                    # Record the final silence (the one that ended the utterance)
-                    final_silence = 0.0
-                    if silence_start_time is not None:
-                        final_silence = time.time() - silence_start_time
-
-                    # Calculate silence stats
-                    mid_gaps = list(silence_gaps)  # pauses where speech resumed
-                    max_mid_gap = max(mid_gaps) if mid_gaps else 0.0
-                    total_duration = len(speech_audio) / BYTES_PER_SEC
-                    silence_report = {
-                        "maxGap": round(max_mid_gap, 1),
-                        "gapCount": len(mid_gaps),
-                        "audioDuration": round(total_duration, 1),
-                        "finalSilence": round(final_silence, 1),
-                    }
-                    silence_gaps = []
-                    silence_start_time = None
-
-                    # At least 0.5s of audio (16000 samples/sec * 2 bytes = 32000 bytes/sec)
-                    if len(speech_audio) > SAMPLE_RATE:
-                        logger.info(f"Call {call.call_id}: transcribing {len(speech_audio)} bytes "
-                                    f"(maxGap={silence_report['maxGap']}s, gaps={silence_report['gapCount']})")
-
-                        # Show transcribing status
-                        await send_control(ws, {"type": "state", "state": "transcribing"})
-
-                        # Run STT (direct faster-whisper with beam=1 for speed)
-                        stt_start = time.time()
-                        audio_float = np.frombuffer(speech_audio, dtype=np.int16).astype(np.float32) / 32768.0
-                        segments, _ = await asyncio.get_event_loop().run_in_executor(
-                            None, lambda: _fast_whisper.transcribe(audio_float, beam_size=1, language="en")
-                        )
-                        user_text = " ".join(s.text.strip() for s in segments if s.no_speech_prob < 0.4).strip()
-                        stt_elapsed = time.time() - stt_start
-                        silence_report["sttTime"] = round(stt_elapsed, 1)
-                        logger.info(f"Call {call.call_id}: STT took {stt_elapsed:.1f}s")
-                        if user_text:
-                            logger.info(f"Call {call.call_id}: user said: {user_text}")
-                            call_manager.add_transcript("user", user_text)
-                            await send_control(ws, {
-                                "type": "transcript",
-                                "text": user_text,
-                                "silence": silence_report,
-                            })
-
-                            # Show thinking status while waiting for LLM
-                            await send_control(ws, {"type": "state", "state": "thinking"})
-                            call_manager.transition(CallState.SPEAKING)
-
-                            response_text = await get_llm_response(None, user_text, call)
-                            if response_text:
-                                logger.info(f"Call {call.call_id}: jarvis says: {response_text[:80]}")
-                                call_manager.add_transcript("bot", response_text)
-
-                                # If response is long, send full to WhatsApp and voice just a summary
-                                MAX_VOICE_CHARS = 255
-                                if len(response_text) > MAX_VOICE_CHARS:
-                                    # Send full response to WhatsApp
-                                    await send_to_whatsapp(response_text)
-                                    # Get first sentence for voice
-                                    first_sentence = response_text.split('.')[0].strip() + '.'
-                                    voice_text = first_sentence + " Sent the details to WhatsApp."
-                                    logger.info(f"Call {call.call_id}: long response ({len(response_text)} chars), sent to WA")
-                                else:
-                                    voice_text = response_text
-
-                                await send_control(ws, {
-                                    "type": "response_text",
-                                    "text": voice_text,
-                                })
-
-                                # TTS → send audio
-                                async for tts_frame in tts.run_tts(voice_text, "ctx"):
-                                    if isinstance(tts_frame, TTSAudioRawFrame):
-                                        await send_audio(ws, tts_frame.audio)
-
-                            await send_control(ws, {"type": "done"})
-                            call_manager.transition(CallState.LISTENING)
-                            await send_control(ws, {"type": "state", "state": "listening"})
-                    else:
-                        logger.debug(f"Call {call.call_id}: speech too short ({len(speech_audio)} bytes), skipping")
-
-                # VADState.QUIET — no speech, do nothing
+                audio = msg.data
+                if self._decoder:
+                    try:
+                        audio = self._decoder.decode(audio)
+                    except Exception as e:
+                        logger.warning(f"Call {call.call_id}: dropping undecodable Opus packet: {e}")
+                        continue
+                    if not audio:
+                        continue
+                # Waits only if VAD falls behind by a whole queue
+                await self._uplink.put(audio)
 
             elif msg.type == web.WSMsgType.TEXT:
                 data = json.loads(msg.data)
                 logger.debug(f"Call {call.call_id}: text msg: {data.get('type')}")
                 if data.get("type") == "hangup":
                     logger.info(f"Call {call.call_id}: user hangup")
-                    break
+                    return
                 elif data.get("type") == "vad_stop":
                     # Client adjusting VAD silence threshold
-                    new_stop = float(data.get("value", current_vad_stop))
-                    new_stop = max(0.5, min(15.0, new_stop))  # clamp 0.5-15s
-                    current_vad_stop = new_stop
-                    vad = SileroVADAnalyzer(sample_rate=SAMPLE_RATE, params=VADParams(
-                        stop_secs=current_vad_stop,
-                        start_secs=0.3,
-                        confidence=0.6,
-                        min_volume=0.4,
-                    ))
-                    vad.set_sample_rate(SAMPLE_RATE)
-                    logger.info(f"Call {call.call_id}: VAD stop updated to {current_vad_stop}s")
-                    await send_control(ws, {"type": "vad_updated", "value": current_vad_stop})
+                    await self._update_vad({"stopSecs": data.get("value")})
+                elif data.get("type") == "vad_params":
+                    # Client adjusting any VAD threshold (stopSecs, startSecs, confidence, minVolume)
+                    await self._update_vad(data)
+                elif data.get("type") == "vad_reset":
+                    self.vad.reset()
+                    logger.info(f"Call {call.call_id}: VAD state reset")
 
             elif msg.type in (web.WSMsgType.CLOSE, web.WSMsgType.ERROR):
-                break
-
+                return
+
+    async def _update_vad(self, data: dict):
+        """Apply client VAD params (clamped) to the running VAD — state carries over."""
+        changes = {}
+        for name, (key, low, high) in VAD_PARAM_LIMITS.items():
+            if data.get(key) is not None:
+                changes[name] = max(low, min(high, float(data[key])))
+        params = self.vad.update(**changes)
+        logger.info(f"Call {self.call.call_id}: VAD params updated: stop={params.stop_secs}s "
+                    f"start={params.start_secs}s conf={params.confidence} vol={params.min_volume}")
+        await self.send_control({"type": "vad_updated", "value": params.stop_secs, "params": vad_params_dict(params)})
+
+    async def _vad_loop(self):
+        vad = self.vad
+        logger.info(f"Call {self.call.call_id}: VAD params: stop={vad.params.stop_secs}s "
+                    f"start={vad.params.start_secs}s conf={vad.params.confidence} vol={vad.params.min_volume}")
+        while True:
+            await self._on_audio(await self._uplink.get())
+
+    async def _on_audio(self, audio_bytes: bytes):
+        """Feed one uplink frame to VAD and act on the resulting state."""
+        call = self.call
+        vad_state = await self.vad.analyze_audio(audio_bytes)
+        self._audio_clock += len(audio_bytes) / BYTES_PER_SEC
+        now = self._audio_clock
+
+        # Track silence gaps within speech
+        if self._prev_vad_state in (VADState.SPEAKING, VADState.STARTING) and vad_state == VADState.STOPPING:
+            # Just went from speaking to silence — start timing the gap
+            self._silence_start = now
+            self._pause_offset = len(self._speech)
+        elif vad_state in (VADState.SPEAKING, VADState.STARTING) and self._silence_start is not None:
+            # Resumed speaking after a gap — record the gap
+            gap = now - self._silence_start
+            self._silence_gaps.append(gap)
+            self._silence_start = None
+
+            # User wasn't done after all — discard the speculative turn
+            if self._speculative_turn:
+                self._speculative_turn.cancel()
+                self._speculative_turn = None
+                logger.debug(f"Call {call.call_id}: speech resumed, speculative turn discarded")
+
+            # Speech before the pause is closed off — transcribe it while the user keeps talking
+            if self._utterance and gap >= STT_SEGMENT_PAUSE_SECS and self._pause_offset >= MIN_SEGMENT_SAMPLES:
+                self._utterance.submit(self._speech.take(self._pause_offset))
+            self._pause_offset = None
+        self._prev_vad_state = vad_state
+
+        # Barge-in: the user talks over the bot — stop the response and listen
+        if vad_state == VADState.SPEAKING and call.state == CallState.SPEAKING and self._turn_active():
+            await self._barge_in()
+
+        if vad_state == VADState.STARTING:
+            # Speech just started
+            if not self._is_speaking:
+                self._is_speaking = True
+                self._speech.start()  # seeded with the pre-roll, so the onset isn't clipped
+                self._utterance = IncrementalTranscript(models.get("whisper"), call.call_id)
+                self._silence_gaps = []
+                self._silence_start = None
+                self._pause_offset = None
+                logger.debug(f"Call {call.call_id}: VAD speech start")
+            self._speech.write(audio_bytes)
+
+        elif vad_state == VADState.SPEAKING:
+            # Speech continuing
+            self._is_speaking = True
+            self._speech.write(audio_bytes)
+
+            # Speaker never pauses — cut a segment anyway to bound the buffer
+            if self._utterance and len(self._speech) >= MAX_SEGMENT_SAMPLES:
+                self._utterance.submit(self._speech.take())
+
+        elif vad_state == VADState.STOPPING:
+            # Still counting silence — keep buffering but don't commit the turn yet
+            self._speech.write(audio_bytes, speech=False)
+
+            # Optionally start STT (+LLM) now, so QUIET only has to commit the result
+            if (SPECULATIVE_TURN != "off" and self._utterance and self._speculative_turn is None
+                    and self._silence_start is not None
+                    and now - self._silence_start >= SPECULATIVE_AFTER_SECS):
+                self._speculative_turn = asyncio.create_task(
+                    speculate_turn(self._utterance, self._speech.peek(), call)
+                )
+                logger.debug(f"Call {call.call_id}: speculative turn started")
+
+        elif vad_state == VADState.QUIET and self._is_speaking:
+            # Full stop_secs of silence elapsed — NOW transcribe
+            self._speech.write(audio_bytes, speech=False)
+            await self._end_utterance()
+
+        else:
+            # VADState.QUIET — no speech, just keep the pre-roll fresh
+            self._speech.write(audio_bytes)
+
+    async def _end_utterance(self):
+        """Hand the finished utterance to the turn task (or drop it if too short)."""
+        call = self.call
+        self._is_speaking = False
+        preroll = self._speech.preroll_samples
+        utterance_samples = self._speech.utterance_samples
+        tail_audio = self._speech.take()  # trailing silence trimmed
+        self._speech.stop()
+        pending, self._utterance = self._utterance, None
+        speculation, self._speculative_turn = self._speculative_turn, None
+        self._pause_offset = None
+        decoded_samples = len(tail_audio) + (pending.submitted_samples if pending else 0)
+
+        # Record the final silence (the one that ended the utterance)
+        final_silence = 0.0
+        if self._silence_start is not None:
+            final_silence = self._audio_clock - self._silence_start
+
+        # Calculate silence stats
+        mid_gaps = list(self._silence_gaps)  # pauses where speech resumed
+        max_mid_gap = max(mid_gaps) if mid_gaps else 0.0
+        total_duration = utterance_samples / SAMPLE_RATE
+        silence_report = {
+            "maxGap": round(max_mid_gap, 1),
+            "gapCount": len(mid_gaps),
+            "audioDuration": round(total_duration, 1),
+            "finalSilence": round(final_silence, 1),
+            "decodedDuration": round(decoded_samples / SAMPLE_RATE, 1),  # after silence compaction
+        }
+        self._silence_gaps = []
+        self._silence_start = None
+
+        # At least 0.5s of speech, not counting the pre-roll or the stop_secs of silence that ended it
+        speech_samples = utterance_samples - preroll - int(self.vad.params.stop_secs * SAMPLE_RATE)
+        if not (speech_samples > MIN_UTTERANCE_SAMPLES and pending):
+            if pending:
+                pending.cancel()
+            if speculation:
+                speculation.cancel()
+            logger.debug(f"Call {call.call_id}: speech too short ({speech_samples / SAMPLE_RATE:.2f}s), skipping")
+            return
+
+        logger.info(f"Call {call.call_id}: transcribing {total_duration:.1f}s as {decoded_samples / SAMPLE_RATE:.1f}s "
+                    f"({pending.segment_count} segments done early, tail {len(tail_audio) / SAMPLE_RATE:.1f}s, "
+                    f"maxGap={silence_report['maxGap']}s, gaps={silence_report['gapCount']})")
+        turn = Turn(pending, speculation, tail_audio, silence_report)
+        try:
+            self._turns.put_nowait(turn)
+        except asyncio.QueueFull:
+            turn.cancel()
+            logger.warning(f"Call {call.call_id}: {TURN_QUEUE_SIZE} turns already waiting, dropping utterance")
+            await self.send_control({"type": "error", "message": "Still answering, please repeat that in a moment."})
+
+    # ── Turns ──
+    async def _turn_loop(self, timezone: str):
+        """Greet the caller, then answer turns one at a time, in order."""
+        await self._greet(timezone)
+        while True:
+            turn = await self._turns.get()
+            self._current_turn = asyncio.create_task(process_turn(self, turn))
+            await asyncio.wait([self._current_turn])
+            self._current_turn = None
+
+    async def _greet(self, timezone: str):
+        call = self.call
+        call_manager.transition(call.call_id, CallState.RINGING)
+
+        # Ring, pickup and greeting play back to back — the downlink paces them
+        await self.send_clip("ring", RING_AUDIO)
+        call_manager.transition(call.call_id, CallState.ANSWERED)
+        await self.send_clip("pickup", PICKUP_AUDIO)
+
+        greeting_key = get_greeting_key(timezone)
+        greeting_audio = GREETINGS.get(greeting_key, b"")
+        if greeting_audio:
+            call_manager.transition(call.call_id, CallState.ACTIVE)
+            call_manager.transition(call.call_id, CallState.SPEAKING)
+            await self.send_control({"type": "state", "state": "speaking"})
+            await self.send_clip(greeting_key, greeting_audio)
+            call_manager.add_transcript(call.call_id, "bot", f"Good {greeting_key} sir.")
+            await self.downlink.wait_played()
+
+        call_manager.transition(call.call_id, CallState.LISTENING)
+        await self.send_control({"type": "state", "state": "listening"})
+        logger.info(f"Call {call.call_id}: pipeline started")
+
+    def _turn_active(self) -> bool:
+        return self._current_turn is not None and not self._current_turn.done()
+
+    def _drop_queued_turns(self):
+        while not self._turns.empty():
+            self._turns.get_nowait().cancel()
+
+    async def _barge_in(self):
+        """Cancel the reply in progress and anything queued behind it, then listen."""
+        self._current_turn.cancel()
+        self._drop_queued_turns()
+        dropped = self.flush_audio()
+        logger.info(f"Call {self.call.call_id}: barge-in, response cancelled ({dropped} frames unsent)")
+        await self.send_control({"type": "flush"})
+        call_manager.transition(self.call.call_id, CallState.LISTENING)
+        await self.send_control({"type": "state", "state": "listening"})
+
+
+async def run_pipeline(ws: web.WebSocketResponse, call: CallRecord, timezone: str = "UTC", codec: str = "pcm"):
+    """Run the voice pipeline for a single call (already admitted by the call manager)."""
+    try:
+        await CallSession(ws, call, codec).run(timezone)
     except Exception as e:
         logger.error(f"Call {call.call_id}: pipeline error: {e}")
         import traceback
         traceback.print_exc()
-        call_manager.end_call(CallState.ERROR)
+        call_manager.end_call(call.call_id, CallState.ERROR)
     else:
-        call_manager.end_call(CallState.HANGUP_USER)
+        call_manager.end_call(call.call_id, CallState.HANGUP_USER)
 
     logger.info(f"Call {call.call_id}: ended ({call.state.value}), "
                 f"duration {call.duration_seconds:.1f}s, "
                 f"{len(call.transcript)} transcript entries")
 
 
-async def get_llm_response(llm, user_text: str, call) -> str:
-    """Get a response from OpenClaw main session via Chat Completions API.
+async def process_turn(session: CallSession, turn: Turn):
+    """Answer one endpointed utterance: STT → OpenClaw → TTS.
+
+    Runs as a task of the call's turn loop; barge-in and hangup cancel it.
+    """
+    call = session.call
+    silence_report = turn.silence_report
+    timeline = session.timeline = turn.timeline
+    try:
+        # Show transcribing status
+        await session.send_control({"type": "state", "state": "transcribing"})
+
+        # Run STT on the tail (shared faster-whisper pool with beam=1 for speed),
+        # or commit the speculative turn started when the silence began
+        stt_start = time.time()
+        timeline.mark("stt_start")
+        early_response = None
+        try:
+            if turn.speculation:
+                stt_result, early_response = await turn.speculation
+                logger.info(f"Call {call.call_id}: speculative turn committed")
+            else:
+                stt_result = await turn.pending.finish(turn.tail_audio)
+        except STTQueueFull:
+            logger.warning(f"Call {call.call_id}: STT queue full, dropping utterance")
+            await session.send_control({"type": "error", "message": "Too busy to transcribe, please repeat."})
+            await session.send_control({"type": "state", "state": "listening"})
+            return
+        timeline.mark("stt_end")
+        user_text = stt_result.text
+        stt_elapsed = time.time() - stt_start
+        silence_report["sttTime"] = round(stt_elapsed, 1)
+        logger.info(f"Call {call.call_id}: STT took {stt_elapsed:.1f}s "
+                    f"(queued {stt_result.wait_secs:.2f}s)")
+        if not user_text:
+            return
+
+        logger.info(f"Call {call.call_id}: user said: {user_text}")
+        call_manager.add_transcript(call.call_id, "user", user_text)
+        await session.send_control({
+            "type": "transcript",
+            "text": user_text,
+            "silence": silence_report,
+        })
+
+        # Show thinking status while waiting for LLM
+        await session.send_control({"type": "state", "state": "thinking"})
+
+        if LLM_STREAMING and not early_response:
+            # Speak each sentence as soon as OpenClaw has streamed it
+            response_text, voice_text = await speak_streamed_response(session, user_text)
+            if response_text:
+                logger.info(f"Call {call.call_id}: jarvis said: {response_text[:80]}")
+                call_manager.add_transcript(call.call_id, "bot", response_text)
+                await session.send_control({
+                    "type": "response_text",
+                    "text": voice_text,
+                })
+        else:
+            response_text = early_response or await reply_within_budget(session, get_llm_response(user_text, call))
+            if response_text is not None:  # None: cancelled at the deadline
+                timeline.mark("llm_done")  # no first byte here: only streaming sees one
+            if response_text:
+                logger.info(f"Call {call.call_id}: jarvis says: {response_text[:80]}")
+                call_manager.add_transcript(call.call_id, "bot", response_text)
+
+                # If response is long, send full to WhatsApp and voice just a summary
+                if len(response_text) > MAX_VOICE_CHARS:
+                    # Send full response to WhatsApp
+                    send_to_whatsapp(response_text)
+                    # Get first sentence for voice
+                    first_sentence = response_text.split('.')[0].strip() + '.'
+                    # Suffix synthesized on its own so it comes from the TTS cache
+                    voice_parts = [first_sentence, WHATSAPP_SUFFIX]
+                    logger.info(f"Call {call.call_id}: long response ({len(response_text)} chars), sent to WA")
+                else:
+                    voice_parts = [response_text]
+
+                await session.send_control({
+                    "type": "response_text",
+                    "text": " ".join(voice_parts),
+                })
+
+                # TTS → send audio
+                for part in voice_parts:
+                    await speak(session, part)
+
+        # The turn lasts until the client has played the reply, so barge-in can still cut it
+        await session.downlink.wait_played()
+        await session.send_control({"type": "done"})
+        call_manager.transition(call.call_id, CallState.LISTENING)
+        await session.send_control({"type": "state", "state": "listening"})
+        record_turn(timeline)
+
+    except asyncio.CancelledError:
+        turn.cancel()
+        raise
+    except Exception as e:
+        logger.error(f"Call {call.call_id}: turn error: {e}")
+        import traceback
+        traceback.print_exc()
+        call_manager.end_call(call.call_id, CallState.ERROR)
+        await session.ws.close()
 
-    Uses X-OpenClaw-Session-Key header with the full session key "agent:main:main"
-    to inject into the actual main session (same as WhatsApp conversation).
+
+async def speculate_turn(utterance: IncrementalTranscript, audio: np.ndarray, call) -> tuple[STTResult, Optional[str]]:
+    """Transcribe (and with SPECULATIVE_TURN=llm, answer) an utterance before VAD endpoints it.
+
+    Runs as a task that the call's VAD cancels if the user resumes speaking.
     """
-    import aiohttp
+    stt_result = await utterance.peek(audio)
+    response_text = None
+    if SPECULATIVE_TURN == "llm" and stt_result.text:
+        response_text = await get_llm_response(stt_result.text, call)
+    return stt_result, response_text
+
 
-    prompt = (
+def build_voice_prompt(user_text: str) -> str:
+    """Wrap the user's words with the voice-call rules for Jarvis."""
+    return (
         f"[🎤 Voice Call] The user is speaking through the voice call app. "
         f"Your response will be converted to speech via TTS.\n\n"
         f"RULES:\n"
@@ -340,83 +853,178 @@ async def get_llm_response(llm, user_text: str, call) -> str:
         f'They said: "{user_text}"'
     )
 
+
+def fallback_reply(error: Exception) -> str:
+    """Spoken reply when OpenClaw couldn't answer."""
+    if isinstance(error, OpenClawError) and error.status is not None:
+        return LLM_ERROR_REPLY
+    return LLM_UNREACHABLE_REPLY
+
+
+async def get_llm_response(user_text: str, call) -> str:
+    """Get a response from OpenClaw main session via Chat Completions API.
+
+    The shared client sends X-OpenClaw-Session-Key "agent:main:main" to inject
+    into the actual main session (same as WhatsApp conversation).
+    """
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{OPENCLAW_URL}/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENCLAW_TOKEN}",
-                    "Content-Type": "application/json",
-                    "X-OpenClaw-Session-Key": "agent:main:main",
-                },
-                json={
-                    "model": "agent:main",
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt,
-                        }
-                    ],
-                },
-                ssl=False,
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    text = data["choices"][0]["message"]["content"]
-                    logger.debug(f"OpenClaw response: {text[:100]}")
-                    return text
-                else:
-                    error = await resp.text()
-                    logger.error(f"OpenClaw API error {resp.status}: {error[:300]}")
-                    return "I'm sorry, I couldn't process that. Could you try again?"
+        text = await openclaw.complete(build_voice_prompt(user_text))
+        logger.debug(f"OpenClaw response: {text[:100]}")
+        return text
     except Exception as e:
         logger.error(f"OpenClaw request failed: {e}")
-        return "I'm having trouble connecting. Please try again in a moment."
+        return fallback_reply(e)
 
 
-# ── WhatsApp Helper ────────────────────────────────────────────
-async def send_to_whatsapp(text: str):
-    """Send a message to WhatsApp via OpenClaw Chat Completions.
-    Uses a simple instruction to forward the text.
+async def reply_within_budget(session: CallSession, reply: Awaitable[str]) -> Optional[str]:
+    """Await the OpenClaw reply under the turn's budget, with a filler if it's slow.
+
+    Past the deadline the request is cancelled, the apology is played and None is returned.
     """
-    import aiohttp
+    reply = asyncio.ensure_future(reply)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{OPENCLAW_URL}/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENCLAW_TOKEN}",
-                    "Content-Type": "application/json",
-                    "X-OpenClaw-Session-Key": "agent:main:main",
-                },
-                json={
-                    "model": "agent:main",
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": (
-                                f"[🎤 Voice Call — WhatsApp Forward] "
-                                f"Send the following text to WhatsApp using the message tool, "
-                                f"then reply with ONLY: NO_REPLY\n\n"
-                                f"Text to send:\n{text}"
-                            ),
-                        }
-                    ],
-                },
-                ssl=False,
-            ) as resp:
-                if resp.status != 200:
-                    error = await resp.text()
-                    logger.error(f"WhatsApp forward failed: {resp.status}: {error[:200]}")
+        if await llm_budget.wait(reply, session.play_filler):
+            return reply.result()
+    finally:
+        reply.cancel()
+    await apologize(session)
+    return None
+
+
+async def apologize(session: CallSession):
+    """Tell the caller the reply took too long (cached clip, or live TTS until it's rendered)."""
+    call = session.call
+    logger.warning(f"Call {call.call_id}: no reply within {LLM_DEADLINE_SECS:.0f}s, request cancelled")
+    call_manager.add_transcript(call.call_id, "bot", LLM_DEADLINE_REPLY)
+    await session.send_control({"type": "response_text", "text": LLM_DEADLINE_REPLY})
+    if "deadline" not in RENDERED_CLIPS:
+        await speak(session, LLM_DEADLINE_REPLY)
+        return
+    await session.enter_speaking()
+    await session.send_clip("deadline", RENDERED_CLIPS["deadline"])
+
+
+async def stream_llm_response(user_text: str, call,
+                              timeline: Optional[TurnTimeline] = None) -> AsyncGenerator[str, None]:
+    """Stream a response from the OpenClaw main session as text deltas.
+
+    A failure partway through ends the stream; one before any text is raised.
+    """
+    got_text = False
+    try:
+        async for delta in openclaw.stream(build_voice_prompt(user_text)):
+            if not got_text and timeline:
+                timeline.mark("llm_first_byte")
+            got_text = True
+            yield delta
     except Exception as e:
-        logger.error(f"WhatsApp forward error: {e}")
+        logger.error(f"OpenClaw stream failed: {e}")
+        if not got_text:
+            raise
+
+
+async def speak_streamed_response(session: CallSession, user_text: str) -> tuple[str, str]:
+    """Speak the streamed OpenClaw reply sentence by sentence.
+
+    Sentences are voiced while the running total fits in MAX_VOICE_CHARS; once a
+    reply outgrows it, the rest is only collected and the full text goes to
+    WhatsApp. The wait for the first sentence is under the LLM budget; past its
+    deadline the apology is played instead. Returns (full response text, voiced text).
+    """
+    call = session.call
+    sentences: asyncio.Queue = asyncio.Queue()
+    first_sentence = asyncio.get_running_loop().create_future()  # done when there's something to say
+    parts = []
+
+    async def produce():
+        segmenter = SentenceSegmenter()
+        try:
+            try:
+                async for delta in stream_llm_response(user_text, call, session.timeline):
+                    parts.append(delta)
+                    for sentence in segmenter.push(delta):
+                        await sentences.put(sentence)
+                        if not first_sentence.done():
+                            first_sentence.set_result(None)
+            except Exception as e:
+                # Spoken whole, not split by the segmenter, so it hits the prewarmed cache
+                reply = fallback_reply(e)
+                parts.append(reply)
+                await sentences.put(reply)
+            session.timeline.mark("llm_done")
+            rest = segmenter.flush()
+            if rest:
+                await sentences.put(rest)
+        finally:
+            await sentences.put(None)
+            if not first_sentence.done():
+                first_sentence.set_result(None)
+
+    producer = asyncio.create_task(produce())
+    voiced = []
+    voiced_chars = 0
+    overflow = False
+    try:
+        if not await llm_budget.wait(first_sentence, session.play_filler):
+            await apologize(session)
+            return "", ""
+        while (sentence := await sentences.get()) is not None:
+            if overflow:
+                continue
+            if voiced and voiced_chars + len(sentence) > MAX_VOICE_CHARS:
+                overflow = True
+                continue
+            voiced.append(sentence)
+            voiced_chars += len(sentence) + 1
+            await speak(session, sentence)
+        await producer
+    finally:
+        producer.cancel()
+
+    response_text = "".join(parts).strip()
+    if overflow:
+        send_to_whatsapp(response_text)
+        voiced.append(WHATSAPP_SUFFIX)
+        await speak(session, WHATSAPP_SUFFIX)
+        logger.info(f"Call {call.call_id}: long response ({len(response_text)} chars), sent to WA")
+    return response_text, " ".join(voiced)
+
+
+# ── WhatsApp Helper ────────────────────────────────────────────
+async def forward_to_whatsapp(text: str):
+    """Send a message to WhatsApp via OpenClaw Chat Completions.
+    Uses a simple instruction to forward the text. Raises on failure (the forwarder retries).
+    """
+    await openclaw.complete(
+        f"[🎤 Voice Call — WhatsApp Forward] "
+        f"Send the following text to WhatsApp using the message tool, "
+        f"then reply with ONLY: NO_REPLY\n\n"
+        f"Text to send:\n{text}"
+    )
+
+
+whatsapp = WhatsAppForwarder(forward_to_whatsapp)
+
+
+def send_to_whatsapp(text: str):
+    """Queue text for WhatsApp; delivery happens in the background."""
+    whatsapp.enqueue(text)
 
 
 # ── WebSocket Helpers ──────────────────────────────────────────
-async def send_audio(ws: web.WebSocketResponse, audio: bytes):
-    """Send audio bytes to WebSocket client."""
-    if audio and not ws.closed:
-        await ws.send_bytes(audio)
+async def speak(session: CallSession, text: str):
+    """Synthesize text with the shared TTS and queue the audio for the client.
+
+    The call enters SPEAKING with the first audio frame, which is what arms barge-in.
+    Cancelling closes the TTS generator right away.
+    """
+    async with aclosing(_shared_tts.run_tts(text, "ctx")) as tts_frames:
+        async for tts_frame in tts_frames:
+            if isinstance(tts_frame, TTSAudioRawFrame):
+                if session.timeline:
+                    session.timeline.mark("tts_first_pcm")
+                await session.enter_speaking()
+                await session.send_audio(tts_frame.audio)
 
 
 async def send_control(ws: web.WebSocketResponse, data: dict):
@@ -425,6 +1033,13 @@ async def send_control(ws: web.WebSocketResponse, data: dict):
         await ws.send_str(json.dumps(data))
 
 
+async def hangup_on_timeout(ws: web.WebSocketResponse, call_id: str):
+    """Max duration reached — tell the client and close its socket."""
+    logger.info(f"Call {call_id}: max duration reached, hanging up")
+    await send_control(ws, {"type": "error", "message": "Maximum call duration reached."})
+    await ws.close()
+
+
 # ── HTTP Routes ────────────────────────────────────────────────
 async def handle_ws(request: web.Request) -> web.WebSocketResponse:
     """Handle WebSocket voice connections."""
@@ -433,26 +1048,53 @@ async def handle_ws(request: web.Request) -> web.WebSocketResponse:
 
     logger.info(f"Client connected: {request.remote}")
 
-    # Wait for connect message
-    timezone = "UTC"
-    try:
-        msg = await asyncio.wait_for(ws.receive(), timeout=10)
-        if msg.type == web.WSMsgType.TEXT:
-            data = json.loads(msg.data)
-            if data.get("type") == "connect":
-                timezone = data.get("timezone", "UTC")
-    except asyncio.TimeoutError:
-        pass
-
-    # Send connected acknowledgment
-    await send_control(ws, {
-        "type": "connected",
-        "callId": "pending",
-        "greeting": get_greeting_key(timezone),
-    })
+    # Until the models are warm, callers go to another instance (or retry)
+    if not models.ready:
+        logger.warning(f"Rejecting {request.remote}: models still loading")
+        await send_control(ws, {"type": "busy", "message": "Jarvis is starting up. Try again shortly."})
+        await ws.close()
+        return ws
+
+    # Admission control: never take over another caller's session
+    call = call_manager.start_call(on_timeout=lambda call_id: hangup_on_timeout(ws, call_id))
+    if call is None:
+        logger.warning(f"Rejecting {request.remote}: {call_manager.active_count} calls active "
+                       f"(max {call_manager.max_concurrent_calls})")
+        await send_control(ws, {"type": "busy", "message": "Jarvis is on another call. Try again shortly."})
+        await ws.close()
+        return ws
 
-    # Run the voice pipeline
-    await run_pipeline(ws, timezone)
+    try:
+        # Wait for connect message
+        timezone = "UTC"
+        codec = "pcm"
+        try:
+            msg = await asyncio.wait_for(ws.receive(), timeout=10)
+            if msg.type == web.WSMsgType.TEXT:
+                data = json.loads(msg.data)
+                if data.get("type") == "connect":
+                    timezone = data.get("timezone", "UTC")
+                    # Opus if asked for and available, else raw PCM
+                    if data.get("codec") == "opus" and OPUS_AVAILABLE:
+                        codec = "opus"
+        except asyncio.TimeoutError:
+            pass
+
+        # Send connected acknowledgment (with the codec both directions will use)
+        await send_control(ws, {
+            "type": "connected",
+            "callId": call.call_id,
+            "greeting": get_greeting_key(timezone),
+            "codec": codec,
+        })
+        if codec == "opus":
+            logger.info(f"Call {call.call_id}: Opus transport ({OPUS_BITRATE // 1000} kbit/s, {OPUS_FRAME_MS}ms frames)")
+
+        # Run the voice pipeline
+        await run_pipeline(ws, call, timezone, codec)
+    finally:
+        # Always free the slot, even if the handshake failed or the pipeline was cancelled
+        call_manager.end_call(call.call_id, CallState.HANGUP_USER)
 
     logger.info(f"Client disconnected: {request.remote}")
     return ws
@@ -460,7 +1102,34 @@ async def handle_ws(request: web.Request) -> web.WebSocketResponse:
 
 async def handle_health(request: web.Request) -> web.Response:
     """Health check endpoint."""
-    return web.json_response({"status": "ok", "service": "jarvis-voice-v2"})
+    return web.json_response({
+        "status": "ok",
+        "service": "jarvis-voice-v2",
+        "activeCalls": call_manager.active_count,
+        "maxCalls": call_manager.max_concurrent_calls,
+        "models": models.stats(),
+        "stt": stt.stats() if (stt := models.peek("whisper")) else None,
+        "vad": _vad_engine.stats() if _vad_engine else None,
+        "tts": _shared_tts.stats() if _shared_tts else None,
+        "mp3Decoder": _mp3_decoder.stats(),
+        "ttsCache": _shared_tts.cache_stats() if _shared_tts else None,
+        "openclaw": openclaw.stats(),
+        "llmBudget": llm_budget.stats(),
+        "whatsapp": whatsapp.stats(),
+    })
+
+
+async def handle_ready(request: web.Request) -> web.Response:
+    """Readiness probe: 503 until every model is loaded and warmed up, then 200."""
+    return web.json_response(models.stats(), status=200 if models.ready else 503)
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """Prometheus-style metrics endpoint."""
+    return web.Response(
+        text=metrics.render(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
 
 
 async def handle_index(request: web.Request) -> web.FileResponse:
@@ -472,11 +1141,62 @@ async def handle_index(request: web.Request) -> web.FileResponse:
 
 
 # ── App Setup ──────────────────────────────────────────────────
+async def load_models(app: web.Application):
+    """Load and warm up every model off the event loop, start what needs them, then report ready."""
+    global _vad_engine, _shared_tts
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, models.load_all)
+    except Exception as e:
+        logger.error(f"Model loading failed, staying not ready: {e}")
+        return
+    await models.get("whisper").start()
+    if VAD_BATCH_TICK_MS > 0:
+        _vad_engine = VADEngine(models.get("silero"), tick_secs=VAD_BATCH_TICK_MS / 1000, max_batch=VAD_MAX_BATCH)
+        await _vad_engine.start()
+    if _shared_tts is None:
+        _shared_tts = build_tts()
+    models.mark_ready()
+    stats = models.stats()
+    logger.info(f"Ready after {stats['readyAfter']}s ({stats['rssMB']} MB resident)")
+
+    # Stock phrases go into the TTS cache in the background (needs the network)
+    app["tts_prewarm"] = asyncio.create_task(_shared_tts.prewarm(
+        [LLM_ERROR_REPLY, LLM_UNREACHABLE_REPLY, WHATSAPP_SUFFIX, *TTS_PREWARM]
+    ))
+    app["render_clips"] = asyncio.create_task(render_clips())
+
+
+async def start_services(app: web.Application):
+    """Start background workers for shared services; models load in the background."""
+    await openclaw.start()
+    await whatsapp.start()
+    await loop_lag.start()
+    app["load_models"] = asyncio.create_task(load_models(app))
+
+
+async def stop_services(app: web.Application):
+    """Stop background workers for shared services."""
+    for key in ("load_models", "tts_prewarm", "render_clips"):
+        if key in app:
+            app[key].cancel()
+    if stt := models.peek("whisper"):
+        await stt.stop()
+    if _vad_engine:
+        await _vad_engine.stop()
+    await whatsapp.stop()
+    await loop_lag.stop()
+    await openclaw.close()
+
+
 def create_app() -> web.Application:
     """Create the aiohttp application."""
     app = web.Application()
+    app.on_startup.append(start_services)
+    app.on_cleanup.append(stop_services)
     app.router.add_get("/ws", handle_ws)
     app.router.add_get("/api/health", handle_health)
+    app.router.add_get("/api/ready", handle_ready)
+    app.router.add_get("/api/metrics", handle_metrics)
 
     # Serve web client static files
     if WEB_DIR.exists():
@@ -495,6 +1215,12 @@ def main():
     if not OPENCLAW_TOKEN:
         logger.error("OPENCLAW_TOKEN not set in .env")
         return
+    if _edge_tts:
+        try:
+            _mp3_decoder.check()
+        except DecoderUnavailable as e:
+            logger.error(f"TTS decoder unavailable: {e}")
+            return
 
     app = create_app()
 
@@ -509,9 +1235,16 @@ def main():
     protocol = "https" if ssl_ctx else "http"
     logger.info(f"Starting Jarvis Voice Server on {protocol}://{HOST}:{PORT}")
     logger.info(f"OpenClaw: {OPENCLAW_URL}")
-    logger.info(f"Whisper model: {WHISPER_MODEL}")
-    logger.info(f"VAD stop: {VAD_STOP_SECS}s")
+    logger.info(f"Whisper model: {WHISPER_MODEL} (STT workers: {STT_WORKERS or 'auto'}, queue {STT_MAX_QUEUE})")
+    logger.info(f"VAD: stop {VAD_STOP_SECS}s, start {VAD_START_SECS}s, "
+                f"confidence {VAD_CONFIDENCE}, min volume {VAD_MIN_VOLUME}, "
+                f"batching {f'every {VAD_BATCH_TICK_MS:g}ms' if VAD_BATCH_TICK_MS > 0 else 'off'}")
     logger.info(f"Max call duration: {MAX_CALL_DURATION_MIN} min")
+    logger.info(f"Max concurrent calls: {MAX_CONCURRENT_CALLS}")
+    if _edge_tts and LOCAL_TTS_MODEL:
+        logger.info(f"TTS: edge, local fallback after {TTS_BUDGET_MS:g}ms")
+    else:
+        logger.info(f"TTS: {'edge' if _edge_tts else 'local'} only")
 
     web.run_app(app, host=HOST, port=PORT, ssl_context=ssl_ctx)
 
@@ -0,0 +1,126 @@
+"""Per-turn latency timelines and a small Prometheus-style metrics registry.
+
+Each turn is timestamped from the VAD endpoint through STT, OpenClaw and TTS
+to the first reply audio written to the socket. Completed timelines feed
+histograms, which are served with a few live gauges and counters as
+Prometheus text exposition format.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# Seconds; covers fast cache hits up to slow LLM replies
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+# Turn stages, in pipeline order (each measured from the VAD endpoint)
+TURN_STAGES = ("stt_start", "stt_end", "llm_first_byte", "llm_done", "tts_first_pcm", "first_audio_sent")
+
+
+@dataclass
+class TurnTimeline:
+    """Monotonic timestamps of one turn's stages, starting at the VAD endpoint."""
+    vad_endpoint: float = field(default_factory=time.monotonic)
+    marks: dict[str, float] = field(default_factory=dict)
+
+    def mark(self, stage: str):
+        """Record a stage (the first mark wins)."""
+        self.marks.setdefault(stage, time.monotonic())
+
+    def has(self, stage: str) -> bool:
+        return stage in self.marks
+
+    def offsets(self) -> dict[str, float]:
+        """Seconds from the VAD endpoint to each recorded stage."""
+        return {stage: t - self.vad_endpoint for stage, t in self.marks.items()}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by one label."""
+
+    def __init__(self, name: str, help: str, label: Optional[str] = None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self._label = label
+        self._buckets = tuple(buckets)
+        # label value → (bucket counts, sum, count)
+        self._series: dict[str, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, label_value: str = ""):
+        counts, total, count = self._series.get(label_value) or ([0] * len(self._buckets), 0.0, 0)
+        for i, bound in enumerate(self._buckets):
+            if value <= bound:
+                counts[i] += 1
+        self._series[label_value] = (counts, total + value, count + 1)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total, count) in self._series.items():
+            labels = f'{self._label}="{label_value}",' if self._label else ""
+            for bound, n in zip(self._buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {n}')
+            lines.append(f'{self.name}_bucket{{{labels}le="+Inf"}} {count}')
+            suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Histograms plus gauges and counters read on demand, rendered as Prometheus text."""
+
+    def __init__(self, prefix: str = "jarvis"):
+        self._prefix = prefix
+        self._histograms: list[Histogram] = []
+        self._gauges: list[tuple[str, str, Callable[[], float]]] = []
+        self._counters: list[tuple[str, str, Callable[[], float]]] = []
+
+    def histogram(self, name: str, help: str, label: Optional[str] = None, buckets=LATENCY_BUCKETS) -> Histogram:
+        histogram = Histogram(f"{self._prefix}_{name}", help, label, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]):
+        self._gauges.append((f"{self._prefix}_{name}", help, read))
+
+    def counter(self, name: str, help: str, read: Callable[[], float]):
+        """A monotonically increasing total, read from its owner on demand."""
+        self._counters.append((f"{self._prefix}_{name}", help, read))
+
+    def render(self) -> str:
+        lines = []
+        for name, help, read in self._gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {read()}"]
+        for name, help, read in self._counters:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} counter", f"{name} {read()}"]
+        for histogram in self._histograms:
+            lines += histogram.render()
+        return "\n".join(lines) + "\n"
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag: how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float = 0.5):
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self._interval)
+            self.lag = max(0.0, time.monotonic() - start - self._interval)
+            self.max_lag = max(self.max_lag, self.lag)
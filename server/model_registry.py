@@ -0,0 +1,144 @@
+"""Load each shared model once, warm it up, and report what it cost.
+
+Models (Whisper, Silero, a local TTS voice) are registered as loaders and
+loaded on first use, never twice. At startup `load_all` loads and warms
+every model in turn, off the event loop, recording load time, warm-up time
+and the resident memory each one added. The server binds its port straight
+away, and /api/ready reports ready only once `mark_ready` is called after
+the warm-up.
+"""
+
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+
+def resident_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass(eq=False)
+class _Model:
+    name: str
+    load: Callable[[], Any]
+    warm_up: Optional[Callable[[Any], None]]
+    instance: Any = None
+    load_secs: float = 0.0
+    warm_up_secs: Optional[float] = None  # None until warmed
+    rss_bytes: int = 0  # resident memory added by loading and warming
+    error: Optional[str] = None
+
+
+class ModelRegistry:
+    """Named model loaders; each model is loaded at most once."""
+
+    def __init__(self):
+        self._models: dict[str, _Model] = {}
+        self._lock = threading.Lock()
+        self._ready = False
+        self._ready_secs: Optional[float] = None
+        self._created = time.monotonic()
+
+    def register(self, name: str, load: Callable[[], Any], warm_up: Optional[Callable[[Any], None]] = None):
+        """
+        Args:
+            name: Key for get() and stats
+            load: Builds the model (blocking)
+            warm_up: Runs a throwaway inference on the loaded model (blocking)
+        """
+        if name in self._models:
+            raise ValueError(f"Model {name!r} already registered")
+        self._models[name] = _Model(name, load, warm_up)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        """The model, loading it now (blocking) if this is its first use."""
+        model = self._models[name]
+        if model.instance is None:
+            with self._lock:
+                if model.instance is None:
+                    self._load(model)
+        return model.instance
+
+    def peek(self, name: str) -> Any:
+        """The model if it's registered and loaded, else None (never loads)."""
+        model = self._models.get(name)
+        return model.instance if model else None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def mark_ready(self):
+        """Called once everything that needs the models is up."""
+        self._ready = True
+        self._ready_secs = time.monotonic() - self._created
+
+    def load_all(self):
+        """Load and warm up every registered model in turn (blocking; run it in a thread).
+
+        Raises the first load or warm-up error; the server then stays not ready.
+        """
+        for model in self._models.values():
+            with self._lock:
+                if model.warm_up_secs is not None:
+                    continue
+                # Loaded earlier by get(): its load still counts toward this model's memory
+                rss_before = resident_bytes() - (model.rss_bytes if model.instance is not None else 0)
+                if model.instance is None:
+                    self._load(model)
+                start = time.monotonic()
+                try:
+                    if model.warm_up:
+                        model.warm_up(model.instance)
+                except Exception as e:
+                    model.error = f"warm-up failed: {e}"
+                    raise
+                model.warm_up_secs = time.monotonic() - start
+                model.rss_bytes = resident_bytes() - rss_before
+            logger.info(f"Model {model.name}: loaded in {model.load_secs:.2f}s, "
+                        f"warmed up in {model.warm_up_secs:.2f}s, +{model.rss_bytes / 2**20:.0f} MB resident")
+
+    def _load(self, model: _Model):
+        rss_before = resident_bytes()
+        start = time.monotonic()
+        try:
+            model.instance = model.load()
+        except Exception as e:
+            model.error = f"load failed: {e}"
+            raise
+        model.load_secs = time.monotonic() - start
+        model.rss_bytes = resident_bytes() - rss_before
+
+    def stats(self) -> dict:
+        """Readiness, and each model's load time, warm-up time and resident memory."""
+        return {
+            "ready": self._ready,
+            "readyAfter": round(self._ready_secs, 2) if self._ready_secs is not None else None,
+            "rssMB": round(resident_bytes() / 2**20, 1),
+            "models": {
+                model.name: {
+                    "loaded": model.instance is not None,
+                    "warm": model.warm_up_secs is not None,
+                    "loadSecs": round(model.load_secs, 3),
+                    "warmUpSecs": round(model.warm_up_secs, 3) if model.warm_up_secs is not None else None,
+                    "rssMB": round(model.rss_bytes / 2**20, 1),
+                    "error": model.error,
+                }
+                for model in self._models.values()
+            },
+        }
@@ -0,0 +1,222 @@
+"""MP3 → PCM decoder pool for TTS audio.
+
+Edge TTS delivers MP3; clients want 16-bit mono PCM. The default backend
+decodes in-process with PyAV (no fork per response), using a warm set of
+codec contexts and dedicated decode threads. If PyAV isn't installed, it
+falls back to one ffmpeg subprocess per stream. Either way, concurrency is
+bounded by the pool size.
+"""
+
+import asyncio
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncGenerator, AsyncIterator, Optional
+
+from loguru import logger
+
+try:
+    import av
+except ModuleNotFoundError:
+    av = None
+
+
+class DecoderUnavailable(Exception):
+    """Raised when no MP3 decoder backend can be used."""
+
+
+class _PyAVDecoder:
+    """Incremental in-process MP3 decoder (one stream at a time)."""
+
+    def __init__(self, sample_rate: int):
+        self._sample_rate = sample_rate
+        self.reset()
+
+    def reset(self):
+        """Prepare for a new stream."""
+        self._codec = av.CodecContext.create("mp3", "r")
+        self._resampler = av.AudioResampler(format="s16", layout="mono", rate=self._sample_rate)
+
+    def decode(self, mp3: bytes) -> bytes:
+        """Feed MP3 bytes, return whatever PCM they completed."""
+        out = bytearray()
+        for packet in self._codec.parse(mp3):
+            out += self._decode_packet(packet)
+        return bytes(out)
+
+    def flush(self) -> bytes:
+        """End of stream — drain the parser, decoder and resampler."""
+        out = bytearray()
+        for packet in self._codec.parse(None):
+            out += self._decode_packet(packet)
+        out += self._decode_packet(None)
+        out += self._resample(None)
+        return bytes(out)
+
+    def _decode_packet(self, packet) -> bytes:
+        try:
+            frames = self._codec.decode(packet)
+        except av.error.InvalidDataError:
+            # Tag or junk between frames (e.g. an ID3 header) — skip it like ffmpeg does
+            return b""
+        return b"".join(self._resample(frame) for frame in frames)
+
+    def _resample(self, frame) -> bytes:
+        return b"".join(f.to_ndarray().tobytes() for f in self._resampler.resample(frame))
+
+
+class MP3DecoderPool:
+    """Bounded pool of MP3 decoders shared by all calls."""
+
+    def __init__(self, sample_rate: int = 16000, size: int = 4, backend: str = "auto"):
+        if backend == "auto":
+            backend = "pyav" if av is not None else "ffmpeg"
+        self._sample_rate = sample_rate
+        self._size = size
+        self._backend = backend
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: list[_PyAVDecoder] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._checked = False
+
+        # Instrumentation
+        self._active = 0
+        self._streams = 0
+        self._failures = 0
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    def check(self):
+        """Verify the backend works and warm it up. Raises DecoderUnavailable."""
+        if self._checked:
+            return
+        if self._backend == "pyav":
+            if av is None:
+                raise DecoderUnavailable("PyAV not installed. Run: pip install av")
+            self._executor = ThreadPoolExecutor(max_workers=self._size, thread_name_prefix="mp3")
+            self._idle = [_PyAVDecoder(self._sample_rate) for _ in range(self._size)]
+        elif self._backend == "ffmpeg":
+            if shutil.which("ffmpeg") is None:
+                raise DecoderUnavailable("ffmpeg not found. Install with: apt install ffmpeg")
+        else:
+            raise DecoderUnavailable(f"Unknown MP3 decoder backend: {self._backend}")
+        self._checked = True
+        logger.info(f"MP3 decoder: {self._backend} (pool size {self._size})")
+
+    def stats(self) -> dict:
+        return {
+            "backend": self._backend,
+            "size": self._size,
+            "active": self._active,
+            "streams": self._streams,
+            "failures": self._failures,
+        }
+
+    async def stream(self, mp3_chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+        """Decode MP3 chunks as they arrive, yielding PCM as soon as it's available."""
+        self.check()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._size)
+
+        async with self._slots:
+            self._active += 1
+            self._streams += 1
+            try:
+                if self._backend == "pyav":
+                    async for pcm in self._stream_pyav(mp3_chunks):
+                        yield pcm
+                else:
+                    async for pcm in self._stream_ffmpeg(mp3_chunks):
+                        yield pcm
+            except Exception:
+                self._failures += 1
+                raise
+            finally:
+                self._active -= 1
+
+    async def decode(self, mp3: bytes) -> bytes:
+        """Decode a whole MP3 buffer."""
+        async def one_chunk():
+            yield mp3
+        return b"".join([pcm async for pcm in self.stream(one_chunk())])
+
+    async def _stream_pyav(self, mp3_chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+        loop = asyncio.get_running_loop()
+        decoder = self._idle.pop() if self._idle else _PyAVDecoder(self._sample_rate)
+        finished = False
+        try:
+            async for mp3 in mp3_chunks:
+                pcm = await loop.run_in_executor(self._executor, decoder.decode, mp3)
+                if pcm:
+                    yield pcm
+            pcm = await loop.run_in_executor(self._executor, decoder.flush)
+            if pcm:
+                yield pcm
+            finished = True
+        finally:
+            # An interrupted stream may still be decoding on its thread, so a fresh decoder replaces it
+            self._return_decoder(decoder if finished else None)
+
+    def _return_decoder(self, decoder: Optional[_PyAVDecoder]):
+        """Reset `decoder` (or build a new one) on a decode thread, then put it back in the idle pool."""
+        prepare = decoder.reset if decoder else partial(_PyAVDecoder, self._sample_rate)
+
+        def done(future):
+            if future.cancelled():
+                return
+            if error := future.exception():
+                logger.warning(f"MP3 decoder not returned to the pool: {error}")
+                return
+            self._idle.append(decoder or future.result())
+
+        asyncio.get_running_loop().run_in_executor(self._executor, prepare).add_done_callback(done)
+
+    async def _stream_ffmpeg(self, mp3_chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-loglevel", "error",
+                "-fflags", "nobuffer",
+                "-f", "mp3",
+                "-i", "pipe:0",
+                "-f", "s16le",
+                "-acodec", "pcm_s16le",
+                "-ar", str(self._sample_rate),
+                "-ac", "1",
+                "-flush_packets", "1",
+                "pipe:1",
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            raise DecoderUnavailable("ffmpeg not found. Install with: apt install ffmpeg")
+
+        async def feed():
+            try:
+                async for mp3 in mp3_chunks:
+                    proc.stdin.write(mp3)
+                    await proc.stdin.drain()
+            finally:
+                if not proc.stdin.is_closing():
+                    proc.stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while pcm := await proc.stdout.read(4096):
+                yield pcm
+            # Surface source/pipe errors, then decoder errors
+            await feeder
+            await proc.wait()
+            if proc.returncode != 0:
+                stderr = await proc.stderr.read()
+                logger.error(f"ffmpeg error: {stderr.decode()[:200]}")
+        finally:
+            if not feeder.done():
+                feeder.cancel()
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
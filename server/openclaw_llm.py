@@ -1,30 +1,201 @@
-"""OpenClaw LLM integration for Pipecat.
+"""OpenClaw gateway client.
 
 Uses OpenClaw's Chat Completions API (OpenAI-compatible).
 Routes to main session = real Jarvis with full memory + personality.
+
+One client lives for the whole app: a pooled keep-alive connection, per-request
+deadlines and bounded retries with backoff. Only failures where the gateway
+can't have seen the message (failed connects, connect timeouts, 502/503/504)
+are retried; a connection dropped after the request went out is not. So a
+retry never injects the same message into the session twice.
 """
 
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Optional
+
+import aiohttp
 from loguru import logger
-from pipecat.services.openai.llm import OpenAILLMService
 
+RETRYABLE_STATUS = {502, 503, 504}
 
-def create_openclaw_llm(openclaw_url: str, openclaw_token: str) -> OpenAILLMService:
-    """Create an OpenAI-compatible LLM service pointing at OpenClaw gateway.
 
-    Args:
-        openclaw_url: Full URL to OpenClaw gateway (e.g. http://127.0.0.1:<port>)
-        openclaw_token: Gateway authentication token
+class OpenClawError(Exception):
+    """Request to the OpenClaw gateway failed.
 
-    Returns:
-        OpenAILLMService configured for OpenClaw
+    `sent` is False only when the request never reached the gateway (the
+    connect failed or timed out). `retryable` is True when the gateway can't
+    have acted on it: never sent, or answered 502/503/504.
     """
-    # OpenClaw's Chat Completions endpoint is OpenAI-compatible
-    base_url = f"{openclaw_url}/v1"
 
-    logger.info(f"OpenClaw LLM: connecting to {openclaw_url}")
+    def __init__(self, message: str, status: Optional[int] = None, *, sent: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.sent = sent
+        self.retryable = not sent or status in RETRYABLE_STATUS
+
+
+class OpenClawClient:
+    """Shared, keep-alive Chat Completions client for the OpenClaw gateway."""
+
+    def __init__(
+        self,
+        openclaw_url: str,
+        openclaw_token: str,
+        *,
+        session_key: str = "agent:main:main",
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        pool_size: int = 16,
+        keepalive: float = 60.0,
+    ):
+        """
+        Args:
+            openclaw_url: Full URL to OpenClaw gateway (e.g. http://127.0.0.1:<port>)
+            openclaw_token: Gateway authentication token
+            session_key: Session the messages are injected into
+            timeout: Deadline for a whole request, including the streamed body
+            connect_timeout: Deadline for opening a connection
+            retries: Extra attempts after a retryable failure
+            backoff: Base delay between attempts (doubles each retry)
+        """
+        self._base_url = openclaw_url.rstrip("/")
+        self._token = openclaw_token
+        self._session_key = session_key
+        self._timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=connect_timeout)
+        self._retries = retries
+        self._backoff = backoff
+        self._pool_size = pool_size
+        self._keepalive = keepalive
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Instrumentation
+        self._requests = 0
+        self._retried = 0
+        self._failures = 0
+
+    async def start(self):
+        """Open the pooled session (call once at app startup)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_size,
+                keepalive_timeout=self._keepalive,
+                ssl=False,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+            logger.info(f"OpenClaw LLM: connecting to {self._base_url}")
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self._requests,
+            "retried": self._retried,
+            "failures": self._failures,
+        }
+
+    async def warm(self):
+        """Open a pooled connection ahead of the first turn (TCP/TLS handshake only)."""
+        await self.start()
+        try:
+            async with self._session.head(self._base_url, timeout=self._timeout) as resp:
+                await resp.read()
+        except Exception as e:
+            logger.debug(f"OpenClaw warm-up failed: {e}")
+
+    async def complete(self, content: str) -> str:
+        """Send one user message and return the whole reply."""
+        async with self._post(content, stream=False) as resp:
+            data = await resp.json()
+            return data["choices"][0]["message"]["content"]
+
+    async def stream(self, content: str) -> AsyncGenerator[str, None]:
+        """Send one user message and yield the reply as text deltas (SSE, `stream: true`).
+
+        Falls back to the whole reply if the gateway answers with plain JSON.
+        """
+        async with self._post(content, stream=True) as resp:
+            if resp.content_type != "text/event-stream":
+                data = await resp.json()
+                yield data["choices"][0]["message"]["content"]
+                return
+
+            async for raw_line in resp.content:
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                choices = json.loads(payload).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+    @asynccontextmanager
+    async def _post(self, content: str, stream: bool) -> AsyncIterator[aiohttp.ClientResponse]:
+        resp = await self._request({
+            "model": "agent:main",
+            "stream": stream,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content,
+                }
+            ],
+        })
+        try:
+            yield resp
+        finally:
+            resp.release()
+
+    async def _request(self, body: dict) -> aiohttp.ClientResponse:
+        """POST with retries; returns a 200 response the caller must release."""
+        await self.start()
+        self._requests += 1
+        attempt = 0
+        while True:
+            try:
+                resp = await self._session.post(
+                    f"{self._base_url}/v1/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self._token}",
+                        "Content-Type": "application/json",
+                        "X-OpenClaw-Session-Key": self._session_key,
+                    },
+                    json=body,
+                )
+            except aiohttp.ConnectionTimeoutError as e:
+                # Never connected, so the gateway can't have seen it (a TimeoutError subclass, so first)
+                error, status = OpenClawError(f"OpenClaw connect timed out: {e}", sent=False), None
+            except asyncio.TimeoutError:
+                # The gateway may already be working on it — don't resend
+                self._failures += 1
+                raise OpenClawError("OpenClaw request timed out")
+            except aiohttp.ClientConnectorError as e:
+                # Never connected either
+                error, status = OpenClawError(f"OpenClaw connection failed: {e}", sent=False), None
+            except aiohttp.ClientConnectionError as e:
+                # Dropped after the request went out (disconnect, reset) — it may have been seen
+                self._failures += 1
+                raise OpenClawError(f"OpenClaw connection lost: {e}")
+            else:
+                if resp.status == 200:
+                    return resp
+                text = await resp.text()
+                resp.release()
+                error, status = OpenClawError(f"OpenClaw API error {resp.status}: {text[:300]}", resp.status), resp.status
 
-    return OpenAILLMService(
-        api_key=openclaw_token,
-        base_url=base_url,
-        model="passthrough",  # OpenClaw uses its own model routing
-    )
+            if attempt >= self._retries or (status is not None and status not in RETRYABLE_STATUS):
+                self._failures += 1
+                raise error
+            attempt += 1
+            self._retried += 1
+            delay = self._backoff * 2 ** (attempt - 1)
+            logger.warning(f"{error} — retrying in {delay:.1f}s ({attempt}/{self._retries})")
+            await asyncio.sleep(delay)
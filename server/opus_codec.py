@@ -0,0 +1,126 @@
+"""Opus audio transport for /ws, negotiated per call in the connect message.
+
+Raw 16 kHz s16le PCM is about 256 kbit/s each way. A client that sends
+`{"type": "connect", "codec": "opus"}` instead exchanges one Opus packet per
+binary message, at voice bitrates (24 kbit/s by default). The server decodes
+uplink packets to PCM before VAD and encodes downlink frames as they're sent,
+so everything between the socket and the codec still sees PCM.
+
+Uses libopus through PyAV (already a dependency for MP3 decoding).
+"""
+
+import numpy as np
+
+OPUS_FRAME_MS = (10, 20, 40, 60)  # packet durations libopus accepts at our rates
+
+
+class OpusUnavailable(Exception):
+    """Raised when PyAV has no libopus encoder/decoder."""
+
+
+def check_opus():
+    """Raise OpusUnavailable unless libopus can both encode and decode."""
+    try:
+        import av
+        av.CodecContext.create("libopus", "w")
+        av.CodecContext.create("libopus", "r")
+    except Exception as e:
+        raise OpusUnavailable(f"libopus not available through PyAV: {e}") from e
+
+
+class OpusEncoder:
+    """16-bit mono PCM → one Opus packet per fixed-size frame (one per call, it's stateful).
+
+    PCM arrives in chunks of any size (TTS frames needn't line up with Opus
+    frames). Samples short of a whole frame wait for the next chunk, and are
+    padded with silence only on flush() at the end of a reply, so no silence
+    is ever inserted mid-speech.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 40, bitrate: int = 24000):
+        """
+        Args:
+            sample_rate: PCM rate (8000, 12000, 16000, 24000 or 48000)
+            frame_ms: Packet duration, one of OPUS_FRAME_MS
+            bitrate: Target bits per second
+        """
+        import av
+
+        if frame_ms not in OPUS_FRAME_MS:
+            raise ValueError(f"Opus frames must be one of {OPUS_FRAME_MS} ms, not {frame_ms}")
+        self._av = av
+        self._sample_rate = sample_rate
+        self._frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self._frame_samples * 2
+        self.frame_secs = frame_ms / 1000
+        self._pending = np.zeros(0, dtype=np.int16)  # samples short of a whole frame
+        self._pts = 0
+        self._ctx = av.CodecContext.create("libopus", "w")
+        self._ctx.sample_rate = sample_rate
+        self._ctx.format = "s16"
+        self._ctx.layout = "mono"
+        self._ctx.bit_rate = bitrate
+        self._ctx.options = {"frame_duration": str(frame_ms), "application": "voip"}
+        self._ctx.open()
+
+    def encode(self, pcm: bytes) -> list[bytes]:
+        """Encode every whole frame available; the rest waits for more PCM or flush()."""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        whole = len(samples) - len(samples) % self._frame_samples
+        self._pending = samples[whole:].copy()
+        return self._encode_frames(samples[:whole])
+
+    def flush(self) -> list[bytes]:
+        """Encode the samples left over as one last frame, padded with silence."""
+        if not len(self._pending):
+            return []
+        padded = np.zeros(self._frame_samples, dtype=np.int16)
+        padded[:len(self._pending)] = self._pending
+        self._pending = np.zeros(0, dtype=np.int16)
+        return self._encode_frames(padded)
+
+    def reset(self):
+        """Drop the samples left over (barge-in: they'd never be played)."""
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def _encode_frames(self, samples: np.ndarray) -> list[bytes]:
+        packets = []
+        for start in range(0, len(samples), self._frame_samples):
+            frame = self._av.AudioFrame.from_ndarray(
+                samples[None, start:start + self._frame_samples], format="s16", layout="mono",
+            )
+            frame.sample_rate = self._sample_rate
+            frame.pts = self._pts
+            self._pts += self._frame_samples
+            packets += [bytes(packet) for packet in self._ctx.encode(frame)]
+        return packets
+
+
+class OpusDecoder:
+    """Opus packets → 16-bit mono PCM at the pipeline's rate (one per call)."""
+
+    def __init__(self, sample_rate: int = 16000):
+        import av
+
+        self._av = av
+        self._ctx = av.CodecContext.create("libopus", "r")
+        # libopus decodes at 48 kHz; resample to what VAD and Whisper expect
+        self._resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+
+    def decode(self, packet: bytes) -> bytes:
+        """PCM for one packet (may be empty while the resampler fills)."""
+        pcm = []
+        for frame in self._ctx.decode(self._av.Packet(packet)):
+            for resampled in self._resampler.resample(frame):
+                pcm.append(resampled.to_ndarray().tobytes())
+        return b"".join(pcm)
+
+
+def encode_clip(pcm: bytes, sample_rate: int = 16000, frame_ms: int = 40, bitrate: int = 24000) -> list[bytes]:
+    """A whole clip as Opus packets, e.g. to cache a static sound once."""
+    if not pcm:
+        return []
+    encoder = OpusEncoder(sample_rate, frame_ms, bitrate)
+    return encoder.encode(pcm) + encoder.flush()
@@ -0,0 +1,50 @@
+"""Incremental sentence segmentation for streamed LLM text.
+
+Tokens are pushed in as they arrive; complete sentences come out as soon as
+their terminating punctuation is followed by whitespace, so TTS can start on
+the first sentence while the rest of the reply is still streaming.
+"""
+
+import re
+from typing import Optional
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) then whitespace, or a line break
+_BOUNDARY = re.compile(r"([.!?…]+[\"')\]]*)\s+|\n+")
+
+# Words whose trailing period doesn't end a sentence
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "e.g.", "i.e.", "approx.", "no."}
+
+
+class SentenceSegmenter:
+    """Splits a stream of text chunks into sentences."""
+
+    def __init__(self, min_chars: int = 10):
+        # Fragments shorter than this are merged into the next sentence
+        # (each TTS request has a fixed round-trip cost)
+        self._min_chars = min_chars
+        self._buffer = ""
+
+    def push(self, text: str) -> list[str]:
+        """Add streamed text and return any sentences it completed."""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            end = match.end(1) if match.group(1) else match.start()
+            candidate = self._buffer[start:end].strip()
+            if not candidate:
+                start = match.end()
+                continue
+            words = candidate.split()
+            if words[-1].lower() in _ABBREVIATIONS or len(candidate) < self._min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the stream has ended."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
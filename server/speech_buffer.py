@@ -0,0 +1,176 @@
+"""Per-call speech capture buffer with pre-roll and VAD-guided compaction.
+
+Uplink int16 samples are written straight into a preallocated array that is
+reused across utterances and only grows (by doubling) for unusually long
+speech. While nobody is speaking, the latest `preroll_secs` of audio are kept
+in a small ring, so an utterance starts with the audio from before VAD
+confirmed speech and word onsets aren't clipped.
+
+Every frame is marked speech or non-speech by VAD. Segments handed to Whisper
+are compacted: trailing silence is trimmed and long pauses are capped, so
+a 15 s stop window costs nothing to decode.
+"""
+
+import numpy as np
+
+from stt_engine import pcm_to_float32
+
+
+class SpeechBuffer:
+    """Pending speech for one call, handed to STT as compacted float32 segments."""
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        preroll_secs: float = 0.3,
+        max_gap_secs: float = 0.3,
+        initial_secs: float = 10.0,
+    ):
+        """
+        Args:
+            sample_rate: Uplink sample rate
+            preroll_secs: Audio kept from before speech starts
+            max_gap_secs: Longest pause passed to Whisper; trailing silence keeps half of it
+            initial_secs: Preallocated capacity
+        """
+        self._data = np.empty(int(initial_secs * sample_rate), dtype=np.int16)
+        self._start = 0  # first sample not yet taken
+        self._end = 0  # one past the last sample written
+        self._runs: list[list] = []  # [is_speech, samples] covering _start:_end
+        self._ring = np.zeros(int(preroll_secs * sample_rate), dtype=np.int16)
+        self._ring_pos = 0
+        self._ring_fill = 0
+        self._max_gap = int(max_gap_secs * sample_rate)
+        self._capturing = False
+        self._taken = 0  # utterance samples already handed out
+        self.preroll_samples = 0  # how much of the current utterance came from the pre-roll
+
+    def __len__(self) -> int:
+        """Samples captured and not yet taken."""
+        return self._end - self._start
+
+    @property
+    def utterance_samples(self) -> int:
+        """Samples captured since start(), before compaction."""
+        return self._taken + len(self)
+
+    def write(self, pcm: bytes, speech: bool = True):
+        """Add a 16-bit PCM frame, marked speech or not by VAD, to the utterance (or the pre-roll)."""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if self._capturing:
+            self._append(samples, speech)
+        else:
+            self._remember(samples)
+
+    def start(self):
+        """Begin an utterance, seeded with the pre-roll."""
+        self._start = self._end = self._taken = 0
+        self._runs = []
+        self.preroll_samples = self._ring_fill
+        if self._ring_fill:
+            # The pre-roll is the speech onset, so it's never trimmed
+            head = self._ring_pos - self._ring_fill
+            if head >= 0:
+                self._append(self._ring[head:self._ring_pos], True)
+            else:
+                self._append(self._ring[head:], True)
+                self._append(self._ring[:self._ring_pos], True)
+        self._ring_fill = 0
+        self._capturing = True
+
+    def stop(self):
+        """End the utterance, dropping anything not taken; back to filling the pre-roll."""
+        self._start = self._end = self._taken = 0
+        self._runs = []
+        self._capturing = False
+        self.preroll_samples = 0
+
+    def take(self, samples: int = None) -> np.ndarray:
+        """Remove the oldest `samples` (default: all) and return them compacted for Whisper."""
+        n = len(self) if samples is None else min(samples, len(self))
+        segment = self._compact(n)
+        self._start += n
+        self._taken += n
+        self._pop_runs(n)
+        if self._start == self._end:
+            self._start = self._end = 0
+        return segment
+
+    def peek(self) -> np.ndarray:
+        """Everything pending, compacted, without removing it."""
+        return self._compact(len(self))
+
+    def _compact(self, n: int) -> np.ndarray:
+        """Keep speech whole, cap pauses to max_gap, trim trailing silence to half of it."""
+        half = self._max_gap // 2
+        runs = []
+        remaining = n
+        for speech, length in self._runs:
+            if remaining <= 0:
+                break
+            runs.append((speech, min(length, remaining)))
+            remaining -= length
+
+        kept = []  # (offset in pending audio, length)
+        offset = 0
+        for i, (speech, length) in enumerate(runs):
+            # A segment cut at a pause starts with that pause, which is capped like any other
+            last = i == len(runs) - 1
+            if speech or (length <= self._max_gap and not last):
+                kept.append((offset, length))
+            else:
+                head = min(length, half)  # trailing off after speech
+                tail = 0 if last else min(length - head, half)  # lead-in to the next speech
+                if head:
+                    kept.append((offset, head))
+                if tail:
+                    kept.append((offset + length - tail, tail))
+            offset += length
+
+        audio = np.empty(sum(length for _, length in kept), dtype=np.float32)
+        position = 0
+        for start, length in kept:
+            source = self._data[self._start + start:self._start + start + length]
+            pcm_to_float32(source, out=audio[position:position + length])
+            position += length
+        return audio
+
+    def _append(self, samples: np.ndarray, speech: bool):
+        needed = len(self) + len(samples)
+        if self._end + len(samples) > len(self._data):
+            if needed <= len(self._data):
+                # Room at the front (segments already taken) — compact in place
+                self._data[:len(self)] = self._data[self._start:self._end]
+            else:
+                grown = np.empty(max(needed, 2 * len(self._data)), dtype=np.int16)
+                grown[:len(self)] = self._data[self._start:self._end]
+                self._data = grown
+            self._end -= self._start
+            self._start = 0
+        self._data[self._end:self._end + len(samples)] = samples
+        self._end += len(samples)
+        if self._runs and self._runs[-1][0] == speech:
+            self._runs[-1][1] += len(samples)
+        elif len(samples):
+            self._runs.append([speech, len(samples)])
+
+    def _pop_runs(self, n: int):
+        while n > 0 and self._runs:
+            run = self._runs[0]
+            if run[1] <= n:
+                n -= run[1]
+                self._runs.pop(0)
+            else:
+                run[1] -= n
+                n = 0
+
+    def _remember(self, samples: np.ndarray):
+        size = len(self._ring)
+        if not size:
+            return
+        samples = samples[-size:]
+        first = min(len(samples), size - self._ring_pos)
+        self._ring[self._ring_pos:self._ring_pos + first] = samples[:first]
+        self._ring[:len(samples) - first] = samples[first:]
+        self._ring_pos = (self._ring_pos + len(samples)) % size
+        self._ring_fill = min(size, self._ring_fill + len(samples))
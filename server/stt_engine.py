@@ -0,0 +1,433 @@
+"""Faster-whisper STT engine with a bounded, per-call fair job queue.
+
+One WhisperModel is loaded with `num_workers` CTranslate2 replicas, and each
+replica gets its own dispatcher thread. Jobs are queued per call and served
+round-robin, so a caller with a long utterance (or several queued segments)
+can't starve everyone else.
+
+Optionally, a worker that picks up a job waits a short batch window and takes
+whatever else is queued by then (still round-robin), decoding all of them in
+one batched encoder/decoder pass. Each transcript goes back to its own job.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+
+
+BATCH_MAX_SAMPLES = 30 * 16000  # Whisper's input window; longer audio isn't batched
+WHISPER_MAX_TOKENS = 448  # decoder context
+
+
+class STTQueueFull(Exception):
+    """Raised when the STT job queue is at capacity."""
+
+
+@dataclass
+class STTResult:
+    """Transcript plus the time the job spent queued and decoding."""
+    text: str
+    wait_secs: float
+    decode_secs: float
+
+
+@dataclass(eq=False)
+class _STTJob:
+    call_id: str
+    audio: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def pcm_to_float32(pcm, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """16-bit PCM (bytes or int16 samples) → float32 samples in [-1, 1) as Whisper expects.
+
+    One pass, written into `out` if given (else one new array) — no intermediate copies.
+    """
+    samples = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, dtype=np.int16)
+    if out is None:
+        out = np.empty(len(samples), dtype=np.float32)
+    np.multiply(samples, np.float32(1 / 32768.0), out=out)
+    return out
+
+
+def default_worker_count() -> int:
+    """One replica per two cores (each replica decodes with two threads)."""
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+class STTEngine:
+    """Pool of faster-whisper replicas fed from a fair job queue."""
+
+    def __init__(
+        self,
+        model: str = "tiny",
+        *,
+        workers: int = 0,
+        max_queue: int = 32,
+        max_per_call: int = 4,
+        language: str = "en",
+        beam_size: int = 1,
+        no_speech_prob: float = 0.4,
+        batch_window: float = 0.0,
+        max_batch: int = 8,
+    ):
+        from faster_whisper import WhisperModel
+
+        self._workers = workers or default_worker_count()
+        self._max_queue = max_queue
+        self._max_per_call = max_per_call
+        self._language = language
+        self._beam_size = beam_size
+        self._no_speech_prob = no_speech_prob
+        self._batch_window = batch_window  # seconds to gather jobs for one batch (0 = no batching)
+        self._max_batch = max_batch
+
+        cpu_threads = max(1, (os.cpu_count() or 1) // self._workers)
+        self._model = WhisperModel(
+            model,
+            device="cpu",
+            compute_type="int8",
+            cpu_threads=cpu_threads,
+            num_workers=self._workers,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="stt")
+        self._tokenizer = None
+        if batch_window > 0:
+            from faster_whisper.tokenizer import Tokenizer
+            self._tokenizer = Tokenizer(
+                self._model.hf_tokenizer, self._model.model.is_multilingual,
+                task="transcribe", language=language,
+            )
+
+        # call_id → pending jobs; iteration order is the round-robin order
+        self._queues: "OrderedDict[str, deque[_STTJob]]" = OrderedDict()
+        self._pending = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+        # Instrumentation
+        self._busy = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._decode_total = 0.0
+        self._batches = 0
+        self._batched_jobs = 0
+
+        batching = f"{batch_window * 1000:g}ms window, up to {max_batch}" if batch_window > 0 else "off"
+        logger.info(f"STT engine: model={model} workers={self._workers} "
+                    f"cpu_threads={cpu_threads} max_queue={max_queue} batching={batching}")
+
+    async def start(self):
+        """Start one dispatcher task per replica."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self._workers)]
+
+    async def stop(self):
+        """Stop dispatchers and fail any jobs still queued."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for jobs in self._queues.values():
+            for job in jobs:
+                if not job.future.done():
+                    job.future.cancel()
+        self._queues.clear()
+        self._pending = 0
+        self._executor.shutdown(wait=False)
+
+    async def transcribe(self, call_id: str, audio: np.ndarray) -> STTResult:
+        """Queue float32 mono 16 kHz audio for a call and wait for its transcript.
+
+        Raises STTQueueFull if the engine or this call's share of it is full.
+        """
+        if self._wakeup is None:
+            await self.start()
+
+        jobs = self._queues.get(call_id)
+        if self._pending >= self._max_queue or (jobs and len(jobs) >= self._max_per_call):
+            self._rejected += 1
+            raise STTQueueFull(f"STT queue full ({self._pending} pending)")
+
+        job = _STTJob(call_id=call_id, audio=audio, future=asyncio.get_running_loop().create_future())
+        if jobs is None:
+            jobs = self._queues[call_id] = deque()
+        jobs.append(job)
+        self._pending += 1
+        self._wakeup.set()
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # Caller gave up (hangup) — drop the job if it hasn't started yet
+            self._discard(job)
+            raise
+
+    @property
+    def max_per_call(self) -> int:
+        return self._max_per_call
+
+    def queued(self, call_id: str) -> int:
+        """Jobs this call has waiting (not yet picked up by a replica)."""
+        return len(self._queues.get(call_id, ()))
+
+    def stats(self) -> dict:
+        """Queue depth and wait/decode timing, for health and metrics endpoints."""
+        done = self._completed or 1
+        return {
+            "workers": self._workers,
+            "busy": self._busy,
+            "queueDepth": self._pending,
+            "queuedCalls": len(self._queues),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avgWait": round(self._wait_total / done, 3),
+            "maxWait": round(self._wait_max, 3),
+            "avgDecode": round(self._decode_total / done, 3),
+            "batches": self._batches,
+            "avgBatch": round(self._batched_jobs / (self._batches or 1), 2),
+        }
+
+    def _next_job(self) -> Optional[_STTJob]:
+        """Pop the oldest job of the next call in round-robin order."""
+        if not self._queues:
+            return None
+        call_id, jobs = next(iter(self._queues.items()))
+        job = jobs.popleft()
+        # Move this call to the back of the rotation (or drop it if drained)
+        del self._queues[call_id]
+        if jobs:
+            self._queues[call_id] = jobs
+        self._pending -= 1
+        return job
+
+    def _discard(self, job: _STTJob):
+        jobs = self._queues.get(job.call_id)
+        if jobs and job in jobs:
+            jobs.remove(job)
+            self._pending -= 1
+            if not jobs:
+                del self._queues[job.call_id]
+
+    def warm_up(self):
+        """Decode a second of silence on every replica (blocking), so no caller pays for cold caches."""
+        silence = np.zeros(16000, dtype=np.float32)
+        list(self._executor.map(self._decode, [silence] * self._workers))
+        if self._tokenizer:
+            self._decode_batch([silence, silence])
+
+    def _decode(self, audio: np.ndarray) -> str:
+        """Runs on an STT thread — iterating segments is where decoding happens."""
+        segments, _ = self._model.transcribe(audio, beam_size=self._beam_size, language=self._language)
+        return " ".join(s.text.strip() for s in segments if s.no_speech_prob < self._no_speech_prob).strip()
+
+    def _decode_batch(self, audios: list[np.ndarray]) -> list[str]:
+        """Runs on an STT thread — one greedy pass over several utterances.
+
+        Each utterance is padded to Whisper's 30 s window and decoded without
+        timestamps; anything longer falls back to a normal decode.
+        """
+        from faster_whisper.audio import pad_or_trim
+
+        model = self._model
+        texts = [""] * len(audios)
+        fits = [i for i, audio in enumerate(audios) if len(audio) <= BATCH_MAX_SAMPLES]
+        for i in set(range(len(audios))) - set(fits):
+            texts[i] = self._decode(audios[i])
+        if not fits:
+            return texts
+
+        features = np.stack([pad_or_trim(model.feature_extractor(audios[i])) for i in fits])
+        encoder_output = model.encode(features)
+        prompt = model.get_prompt(self._tokenizer, [], without_timestamps=True)
+        results = model.model.generate(
+            encoder_output,
+            [prompt] * len(fits),
+            beam_size=self._beam_size,
+            max_length=WHISPER_MAX_TOKENS,
+            suppress_blank=True,
+            return_no_speech_prob=True,
+        )
+        for i, result in zip(fits, results):
+            if result.no_speech_prob < self._no_speech_prob:
+                texts[i] = self._tokenizer.decode(result.sequences_ids[0]).strip()
+        return texts
+
+    def _take_batch(self, first: _STTJob) -> list[_STTJob]:
+        """The first job plus whatever is queued now, round-robin, up to max_batch."""
+        batch = [first]
+        while len(batch) < self._max_batch:
+            job = self._next_job()
+            if job is None:
+                break
+            if not job.future.done():
+                batch.append(job)
+        return batch
+
+    async def _worker(self, index: int):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if job.future.done():
+                continue
+
+            batch = [job]
+            if self._batch_window > 0:
+                # Give calls that endpoint at about the same time a chance to share the pass
+                try:
+                    await asyncio.sleep(self._batch_window)
+                except asyncio.CancelledError:
+                    job.future.cancel()
+                    raise
+                batch = [j for j in self._take_batch(job) if not j.future.done()]
+                if not batch:
+                    continue
+
+            waits = [time.monotonic() - j.enqueued_at for j in batch]
+            self._busy += 1
+            decode_start = time.monotonic()
+            try:
+                if len(batch) == 1:
+                    texts = [await loop.run_in_executor(self._executor, self._decode, batch[0].audio)]
+                else:
+                    texts = await loop.run_in_executor(
+                        self._executor, self._decode_batch, [j.audio for j in batch],
+                    )
+                    self._batches += 1
+                    self._batched_jobs += len(batch)
+            except asyncio.CancelledError:
+                for j in batch:
+                    j.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"STT worker {index}: transcription failed: {e}")
+                for j in batch:
+                    if not j.future.done():
+                        j.future.set_exception(e)
+                continue
+            finally:
+                self._busy -= 1
+
+            decode = time.monotonic() - decode_start
+            for j, text, wait in zip(batch, texts, waits):
+                self._completed += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+                self._decode_total += decode
+                if not j.future.done():
+                    j.future.set_result(STTResult(text=text, wait_secs=wait, decode_secs=decode))
+
+
+class IncrementalTranscript:
+    """Transcribes one utterance piecewise.
+
+    Segments closed off at intra-utterance pauses are submitted while the user
+    keeps talking; at endpoint only the tail is left to decode. A segment is
+    held back while the call's share of the STT queue is nearly full (two slots
+    stay free for a speculative tail and the final one) and merged into the
+    next job, so a talkative caller never has a segment rejected.
+    """
+
+    def __init__(self, engine: STTEngine, call_id: str):
+        self._engine = engine
+        self._call_id = call_id
+        self._tasks: list[asyncio.Task] = []
+        self._held: list[np.ndarray] = []  # closed-off audio waiting for a queue slot
+        self._closed = False
+        self.submitted_samples = 0
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._tasks)
+
+    def submit(self, audio: np.ndarray):
+        """Start transcribing a closed-off float32 segment in the background (or hold it back)."""
+        self.submitted_samples += len(audio)
+        self._held.append(audio)
+        self._submit_held()
+
+    def _submit_held(self):
+        if not self._held or self._closed:
+            return
+        if self._engine.queued(self._call_id) >= self._engine.max_per_call - 2:
+            return  # retried when a segment finishes, at the next submit, or merged into the tail
+        self._start(self._take_held())
+
+    def _take_held(self, tail: Optional[np.ndarray] = None) -> np.ndarray:
+        parts = self._held + ([tail] if tail is not None and len(tail) else [])
+        self._held = []
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def _start(self, audio: np.ndarray):
+        task = asyncio.create_task(self._engine.transcribe(self._call_id, audio))
+        task.add_done_callback(self._segment_done)
+        self._tasks.append(task)
+
+    def _segment_done(self, task: asyncio.Task):
+        if not task.cancelled():
+            task.exception()  # retrieved here so a cancelled utterance never leaves it unobserved
+        self._submit_held()
+
+    async def peek(self, tail: np.ndarray) -> STTResult:
+        """Transcribe the segments so far plus a provisional tail, without committing it.
+
+        Cancelling a peek only cancels the provisional tail; submitted segments keep
+        decoding for the eventual finish().
+        """
+        if self._held:
+            tail = np.concatenate(self._held + [tail])  # provisional: held segments stay held
+        if not len(tail):
+            return self._join(await asyncio.gather(*(asyncio.shield(t) for t in self._tasks)))
+        tail_task = asyncio.create_task(self._engine.transcribe(self._call_id, tail))
+        try:
+            results = await asyncio.gather(*(asyncio.shield(t) for t in self._tasks), tail_task)
+        except BaseException:
+            tail_task.cancel()
+            raise
+        return self._join(results)
+
+    async def finish(self, tail: np.ndarray) -> STTResult:
+        """Transcribe the tail and join it with the background segments, in order.
+
+        Segments still held back are decoded together with the tail.
+        """
+        self._closed = True
+        if self._held or len(tail):
+            self._start(self._take_held(tail))
+        try:
+            results = await asyncio.gather(*self._tasks)
+        except BaseException:
+            self.cancel()
+            raise
+        return self._join(results)
+
+    @staticmethod
+    def _join(results: list[STTResult]) -> STTResult:
+        return STTResult(
+            text=" ".join(r.text for r in results if r.text),
+            wait_secs=max((r.wait_secs for r in results), default=0.0),
+            decode_secs=sum(r.decode_secs for r in results),
+        )
+
+    def cancel(self):
+        """Drop any segments still queued or decoding (hangup, error)."""
+        self._closed = True
+        self._held = []
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,130 @@
+"""Cache of synthesized PCM for phrases the server says over and over.
+
+Keyed by (text, voice, rate, volume, sample_rate). A memory-bounded LRU tier
+serves hits instantly; an optional on-disk tier survives restarts, and is
+bounded too, least recently used files going first.
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+
+def cache_key(text: str, voice: str, rate: str, volume: str, sample_rate: int) -> str:
+    """Stable key for one synthesized phrase."""
+    raw = "\x1f".join([text.strip(), voice, rate, volume, str(sample_rate)])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class PCMCache:
+    """LRU of PCM bytes bounded by total size, with an optional disk tier."""
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        disk_dir: Optional[Path] = None,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+    ):
+        self._max_bytes = max_bytes
+        self._disk_dir = disk_dir
+        self._max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key → file size, least recently used first
+        self._disk_bytes = 0
+
+        # Instrumentation
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+
+        if disk_dir:
+            disk_dir.mkdir(parents=True, exist_ok=True)
+            files = sorted(disk_dir.glob("*.pcm"), key=lambda path: path.stat().st_mtime)
+            for path in files:
+                self._disk[path.stem] = path.stat().st_size
+                self._disk_bytes += self._disk[path.stem]
+            self._trim_disk()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return cached PCM, checking memory first, then disk."""
+        pcm = self._entries.get(key)
+        if pcm is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return pcm
+
+        if self._disk_dir:
+            path = self._disk_dir / f"{key}.pcm"
+            if key in self._disk and path.exists():
+                pcm = await asyncio.to_thread(path.read_bytes)
+                self._disk.move_to_end(key)
+                await asyncio.to_thread(os.utime, path)  # keeps the LRU order across restarts
+                self._remember(key, pcm)
+                self._disk_hits += 1
+                return pcm
+
+        self._misses += 1
+        return None
+
+    async def put(self, key: str, pcm: bytes):
+        """Store PCM in memory (evicting least recently used) and on disk."""
+        if not pcm:
+            return
+        self._remember(key, pcm)
+        if self._disk_dir:
+            path = self._disk_dir / f"{key}.pcm"
+            if len(pcm) > self._max_disk_bytes:
+                return
+            try:
+                await asyncio.to_thread(path.write_bytes, pcm)
+            except OSError as e:
+                logger.warning(f"TTS cache: can't write {path}: {e}")
+                return
+            self._disk_bytes += len(pcm) - self._disk.pop(key, 0)
+            self._disk[key] = len(pcm)
+            self._trim_disk()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self._max_bytes,
+            "diskEntries": len(self._disk),
+            "diskBytes": self._disk_bytes,
+            "hits": self._hits,
+            "diskHits": self._disk_hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "diskEvictions": self._disk_evictions,
+        }
+
+    def _trim_disk(self):
+        while self._disk_bytes > self._max_disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._disk_evictions += 1
+            try:
+                (self._disk_dir / f"{key}.pcm").unlink()
+            except OSError as e:
+                logger.warning(f"TTS cache: can't remove {key}.pcm: {e}")
+
+    def _remember(self, key: str, pcm: bytes):
+        if len(pcm) > self._max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = pcm
+        self._bytes += len(pcm)
+        while self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
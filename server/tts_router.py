@@ -0,0 +1,212 @@
+"""Hedged TTS: a latency budget per request, with a local engine as the hedge.
+
+Each request goes to the primary engine (Edge TTS). If it hasn't produced
+audio within `budget_secs`, or fails before producing any, the fallback
+engine (local Piper) starts too. Whichever yields audio first is streamed,
+and the other is cancelled. With no fallback configured, the primary is
+simply passed through, so a local-only setup works with no network at all.
+
+Per-engine attempts, wins and time to first audio are kept for the health
+and metrics endpoints.
+"""
+
+import asyncio
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, Callable, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import ErrorFrame, Frame, TTSAudioRawFrame
+
+ATTEMPT_QUEUE_FRAMES = 16  # frames an engine may run ahead of the caller
+
+
+class _Attempt:
+    """One engine's synthesis, pumped into a queue so two can race."""
+
+    def __init__(self, name: str, frames: AsyncGenerator[Frame, None], request_start: float):
+        self.name = name
+        self.request_start = request_start
+        self.first_audio: Optional[float] = None  # seconds after the request started
+        self.error: Optional[str] = None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=ATTEMPT_QUEUE_FRAMES)
+        self.started: asyncio.Future = asyncio.get_running_loop().create_future()  # True = audio, False = none
+        self._task = asyncio.create_task(self._pump(frames))
+
+    async def _pump(self, frames: AsyncGenerator[Frame, None]):
+        try:
+            async with aclosing(frames) as frames:
+                async for frame in frames:
+                    if isinstance(frame, ErrorFrame) and self.error is None:
+                        self.error = str(frame.error)
+                    if isinstance(frame, TTSAudioRawFrame) and not self.started.done():
+                        self.first_audio = time.monotonic() - self.request_start
+                        self.started.set_result(True)
+                    await self.queue.put(frame)
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"TTS {self.name} failed: {e}")
+        finally:
+            if not self.started.done():
+                self.started.set_result(False)
+        await self.queue.put(None)  # end of stream (not reached when cancelled)
+
+    async def frames(self) -> AsyncGenerator[Frame, None]:
+        while (frame := await self.queue.get()) is not None:
+            yield frame
+
+    def cancel(self):
+        self._task.cancel()
+
+    async def close(self):
+        """Cancel and wait until the engine's generator is closed (connection, decoder slot freed)."""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+class _EngineStats:
+    def __init__(self):
+        self.attempts = 0
+        self.wins = 0
+        self.errors = 0
+        self.first_audio_total = 0.0
+        self.first_audio_max = 0.0
+
+    def as_dict(self) -> dict:
+        wins = self.wins or 1
+        return {
+            "attempts": self.attempts,
+            "wins": self.wins,
+            "winRate": round(self.wins / (self.attempts or 1), 3),
+            "errors": self.errors,
+            "avgFirstAudio": round(self.first_audio_total / wins, 3),
+            "maxFirstAudio": round(self.first_audio_max, 3),
+        }
+
+
+class TTSRouter:
+    """Routes each request to the primary TTS, hedging with a fallback past the budget."""
+
+    def __init__(
+        self,
+        primary,
+        primary_name: str,
+        fallback=None,
+        fallback_name: str = "local",
+        *,
+        budget_secs: float = 0.8,
+        on_first_audio: Optional[Callable[[str, float], None]] = None,
+    ):
+        """
+        Args:
+            primary: TTS service tried first (its run_tts yields pipecat frames)
+            primary_name: Label for stats
+            fallback: TTS service started past the budget or on error (None = no hedging)
+            fallback_name: Label for stats
+            budget_secs: How long the primary gets to produce audio alone
+            on_first_audio: Called with (winning engine, seconds to first audio)
+        """
+        self._engines = [(primary_name, primary)]
+        if fallback is not None:
+            self._engines.append((fallback_name, fallback))
+        self._primary = primary
+        self._budget = budget_secs
+        self._on_first_audio = on_first_audio
+        self._requests = 0
+        self._hedged = 0
+        self._failed = 0
+        self._stats = {name: _EngineStats() for name, _ in self._engines}
+
+    @property
+    def sample_rate(self) -> int:
+        return self._primary.sample_rate
+
+    def stats(self) -> dict:
+        """Hedging counts and per-engine wins and time to first audio."""
+        engines = {}
+        for name, engine in self._engines:
+            engines[name] = self._stats[name].as_dict()
+            if hasattr(engine, "stats"):
+                engines[name]["service"] = engine.stats()
+        return {
+            "budgetSecs": self._budget,
+            "requests": self._requests,
+            "hedged": self._hedged,
+            "failed": self._failed,
+            "engines": engines,
+        }
+
+    def cache_stats(self) -> Optional[dict]:
+        cache_stats = getattr(self._primary, "cache_stats", None)
+        return cache_stats() if cache_stats else None
+
+    async def prewarm(self, phrases: list[str]):
+        """Pre-warm the primary's phrase cache, if it has one."""
+        if hasattr(self._primary, "prewarm"):
+            await self._primary.prewarm(phrases)
+
+    async def run_tts(self, text: str, context_id: str) -> AsyncGenerator[Frame, None]:
+        """Stream the frames of whichever engine produces audio first."""
+        self._requests += 1
+        request_start = time.monotonic()
+        attempts = [self._start(*self._engines[0], text, context_id, request_start)]
+        winner = None
+        try:
+            if len(self._engines) == 1:
+                winner = attempts[0]  # nothing to hedge with — pass it through
+            else:
+                winner = await self._race(attempts, text, context_id, request_start)
+                if winner is None:
+                    self._failed += 1
+                    yield ErrorFrame("No TTS engine produced audio")
+                    return
+                # Release the losers now, not after the winner has streamed the whole reply
+                await asyncio.gather(*(attempt.close() for attempt in attempts if attempt is not winner))
+            async for frame in winner.frames():
+                yield frame
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            if winner is not None:
+                self._record(winner)
+
+    def _start(self, name: str, engine, text: str, context_id: str, request_start: float) -> _Attempt:
+        self._stats[name].attempts += 1
+        return _Attempt(name, engine.run_tts(text, context_id), request_start)
+
+    async def _race(self, attempts: list[_Attempt], text: str, context_id: str,
+                    request_start: float) -> Optional[_Attempt]:
+        """Give the primary its budget, then race it against the fallback."""
+        primary = attempts[0]
+        done, _ = await asyncio.wait([primary.started], timeout=self._budget)
+        if done and primary.started.result():
+            return primary
+
+        self._hedged += 1
+        fallback_name, fallback = self._engines[1]
+        reason = f"failed ({primary.error})" if done else f"no audio after {self._budget:.2f}s"
+        logger.warning(f"TTS {primary.name} {reason}, starting {fallback_name}")
+        attempts.append(self._start(fallback_name, fallback, text, context_id, request_start))
+
+        pending = {attempt.started: attempt for attempt in attempts}
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for started in done:
+                attempt = pending.pop(started)
+                if started.result():
+                    return attempt
+                self._stats[attempt.name].errors += 1
+        return None
+
+    def _record(self, winner: _Attempt):
+        stats = self._stats[winner.name]
+        if winner.first_audio is None:
+            if winner.error:
+                stats.errors += 1  # passed through and failed
+            return
+        stats.wins += 1
+        stats.first_audio_total += winner.first_audio
+        stats.first_audio_max = max(stats.first_audio_max, winner.first_audio)
+        if self._on_first_audio:
+            self._on_first_audio(winner.name, winner.first_audio)
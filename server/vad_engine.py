@@ -0,0 +1,358 @@
+"""Silero VAD with one shared ONNX session and cheap per-call state.
+
+pipecat's SileroVADAnalyzer opens its own ONNX session, so every call (and
+every VAD change) paid for a model load. Here the session is loaded once and
+shared: Silero's recurrent state is passed in and returned on each inference,
+so a call only keeps that state, its threshold counters and its params.
+
+CallVAD follows pipecat's QUIET → STARTING → SPEAKING → STOPPING state machine
+and volume gate, and its params can change mid-utterance without losing state.
+
+With a VADEngine, calls don't run the model themselves: their windows are
+collected on a fixed tick and every call's next window goes through one
+batched inference on the engine's thread, off the event loop.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from importlib import resources
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+from pipecat.audio.utils import calculate_audio_volume, exp_smoothing
+from pipecat.audio.vad.vad_analyzer import VADParams, VADState
+
+from stt_engine import pcm_to_float32
+
+STATE_SHAPE = (2, 128)  # Silero v5 recurrent state, per stream: (2, batch, 128)
+RESET_STATE_SECS = 5.0  # like pipecat, clear the recurrent state periodically so it can't drift
+VOLUME_SMOOTHING = 0.2
+
+
+class SileroModel:
+    """The Silero VAD ONNX session, shared by every call."""
+
+    def __init__(self, sample_rate: int = 16000):
+        """
+        Args:
+            sample_rate: 16000 or 8000, as Silero supports
+        """
+        import onnxruntime
+
+        if sample_rate not in (16000, 8000):
+            raise ValueError(f"Silero VAD needs 16000 or 8000 Hz audio, not {sample_rate}")
+        self.sample_rate = sample_rate
+        self.window = 512 if sample_rate == 16000 else 256  # samples per inference
+        self.context = 64 if sample_rate == 16000 else 32  # samples carried over from the previous window
+
+        path = resources.files("pipecat.audio.vad.data").joinpath("silero_vad.onnx")
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = 1
+        self._session = onnxruntime.InferenceSession(
+            str(path), providers=["CPUExecutionProvider"], sess_options=opts,
+        )
+        self._sr = np.array(sample_rate, dtype=np.int64)
+        logger.info(f"Silero VAD loaded ({sample_rate} Hz, {self.window}-sample windows)")
+
+    def new_state(self, streams: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """Zeroed (recurrent state, context) for `streams` independent streams."""
+        return (
+            np.zeros((STATE_SHAPE[0], streams, STATE_SHAPE[1]), dtype=np.float32),
+            np.zeros((streams, self.context), dtype=np.float32),
+        )
+
+    def infer(self, windows: np.ndarray, state: np.ndarray, context: np.ndarray):
+        """Speech probability for each stream's next window.
+
+        Args:
+            windows: float32 (streams, window)
+            state: recurrent state (2, streams, 128)
+            context: previous context (streams, context)
+
+        Returns:
+            (probabilities (streams,), new state, new context)
+        """
+        x = np.concatenate((context, windows), axis=1)
+        out, state = self._session.run(None, {"input": x, "state": state, "sr": self._sr})
+        return out[:, 0], state, x[:, -self.context:]
+
+    def warm_up(self, streams: int = 1):
+        """Run a few silent windows through the session (blocking); the first runs are the slow ones."""
+        state, context = self.new_state(streams)
+        windows = np.zeros((streams, self.window), dtype=np.float32)
+        for _ in range(3):
+            _, state, context = self.infer(windows, state, context)
+
+
+@dataclass(eq=False)
+class _VADJob:
+    windows: np.ndarray  # float32 (n, window), consecutive windows of one call
+    state: np.ndarray
+    context: np.ndarray
+    future: asyncio.Future
+    probabilities: Optional[np.ndarray] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class VADEngine:
+    """Batches every call's pending VAD windows into one inference per step, on a fixed tick."""
+
+    def __init__(self, model: SileroModel, *, tick_secs: float = 0.01, max_batch: int = 64):
+        """
+        Args:
+            model: The shared Silero session
+            tick_secs: How often pending windows are collected
+            max_batch: Most streams per inference (larger batches are split)
+        """
+        self.model = model
+        self._tick = tick_secs
+        self._max_batch = max_batch
+        self._jobs: list[_VADJob] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad")
+
+        # Instrumentation
+        self._ticks = 0
+        self._batches = 0
+        self._windows = 0
+        self._max_seen = 0
+        self._infer_total = 0.0
+        self._wait_total = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop ticking and fail any windows still waiting."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for job in self._jobs:
+            if not job.future.done():
+                job.future.cancel()
+        self._jobs = []
+        self._executor.shutdown(wait=False)
+
+    async def infer(self, windows: np.ndarray, state: np.ndarray, context: np.ndarray):
+        """Queue one call's windows for the next tick; same contract as SileroModel.infer per window.
+
+        Returns:
+            (probabilities (n,), new state, new context)
+        """
+        if self._task is None:
+            await self.start()
+        job = _VADJob(windows=windows, state=state, context=context,
+                      future=asyncio.get_running_loop().create_future())
+        self._jobs.append(job)
+        self._wakeup.set()
+        await job.future
+        return job.probabilities, job.state, job.context
+
+    def stats(self) -> dict:
+        """Batch sizes and timing, for health and metrics endpoints."""
+        batches = self._batches or 1
+        return {
+            "tickMs": round(self._tick * 1000, 1),
+            "pending": len(self._jobs),
+            "ticks": self._ticks,
+            "batches": self._batches,
+            "windows": self._windows,
+            "avgBatch": round(self._windows / batches, 2),
+            "maxBatch": self._max_seen,
+            "avgInferMs": round(self._infer_total / batches * 1000, 3),
+            "avgWaitMs": round(self._wait_total / max(1, self._ticks) * 1000, 3),
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            if not self._jobs:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Stay on the tick grid, so windows arriving together share a batch
+            next_tick = max(next_tick + self._tick, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+            jobs, self._jobs = self._jobs, []
+            now = time.monotonic()
+            self._ticks += 1
+            self._wait_total += sum(now - job.enqueued_at for job in jobs) / len(jobs)
+            try:
+                await loop.run_in_executor(self._executor, self._infer_jobs, jobs)
+            except Exception as e:
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                continue
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_result(None)
+
+    def _infer_jobs(self, jobs: list[_VADJob]):
+        """Runs on the VAD thread: step t batches window t of every job that has one."""
+        for job in jobs:
+            job.probabilities = np.empty(len(job.windows), dtype=np.float32)
+        for t in range(max(len(job.windows) for job in jobs)):
+            active = [job for job in jobs if len(job.windows) > t]
+            for i in range(0, len(active), self._max_batch):
+                batch = active[i:i + self._max_batch]
+                start = time.perf_counter()
+                probabilities, state, context = self.model.infer(
+                    np.stack([job.windows[t] for job in batch]),
+                    np.concatenate([job.state for job in batch], axis=1),
+                    np.concatenate([job.context for job in batch], axis=0),
+                )
+                self._infer_total += time.perf_counter() - start
+                self._batches += 1
+                self._windows += len(batch)
+                self._max_seen = max(self._max_seen, len(batch))
+                for k, job in enumerate(batch):
+                    job.probabilities[t] = probabilities[k]
+                    job.state = state[:, k:k + 1]
+                    job.context = context[k:k + 1]
+
+
+class CallVAD:
+    """One call's VAD: recurrent state, threshold counters and live-tunable params."""
+
+    def __init__(self, model: SileroModel, params: VADParams, engine: Optional[VADEngine] = None):
+        """
+        Args:
+            model: The shared Silero session
+            params: Initial thresholds
+            engine: Batch inference through this engine (default: run the model inline)
+        """
+        self._model = model
+        self._engine = engine
+        self._params = params
+        self._window_bytes = model.window * 2
+        self._window_secs = model.window / model.sample_rate
+        self._generation = 0
+        self.reset()
+        self._update_frames()
+
+    @property
+    def params(self) -> VADParams:
+        return self._params
+
+    @property
+    def state(self) -> VADState:
+        return self._vad_state
+
+    def update(
+        self,
+        stop_secs: Optional[float] = None,
+        start_secs: Optional[float] = None,
+        confidence: Optional[float] = None,
+        min_volume: Optional[float] = None,
+    ) -> VADParams:
+        """Change stop_secs, start_secs, confidence and/or min_volume in place.
+
+        Counters and model state carry over, so an utterance in progress is
+        judged by the new thresholds from the next window on.
+        """
+        current = self._params
+        self._params = VADParams(
+            stop_secs=current.stop_secs if stop_secs is None else stop_secs,
+            start_secs=current.start_secs if start_secs is None else start_secs,
+            confidence=current.confidence if confidence is None else confidence,
+            min_volume=current.min_volume if min_volume is None else min_volume,
+        )
+        self._update_frames()
+        return self._params
+
+    def reset(self):
+        """Back to QUIET with fresh model state (the shared model stays loaded)."""
+        self._state, self._context = self._model.new_state()
+        self._pending = b""
+        self._vad_state = VADState.QUIET
+        self._starting_count = 0
+        self._stopping_count = 0
+        self._prev_volume = 0.0
+        self._since_reset = 0.0
+        self._generation += 1
+
+    async def analyze_audio(self, buffer: bytes) -> VADState:
+        """Feed 16-bit PCM and return the VAD state after the last complete window."""
+        self._pending += buffer
+        count = len(self._pending) // self._window_bytes
+        if not count:
+            return self._vad_state
+        data = self._pending[:count * self._window_bytes]
+        self._pending = self._pending[count * self._window_bytes:]
+
+        generation = self._generation
+        confidences, state, context = await self._confidences(pcm_to_float32(data).reshape(count, -1))
+        if generation != self._generation:
+            # Reset while inference was in flight — its results belong to the old state
+            return self._vad_state
+        self._state, self._context = state, context
+        self._since_reset += count * self._window_secs
+        if self._since_reset >= RESET_STATE_SECS:
+            self._state, self._context = self._model.new_state()
+            self._since_reset = 0.0
+        for i, confidence in enumerate(confidences):
+            self._step(data[i * self._window_bytes:(i + 1) * self._window_bytes], float(confidence))
+        return self._vad_state
+
+    async def _confidences(self, windows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Speech probability per window, and the recurrent state after the last one."""
+        try:
+            if self._engine:
+                return await self._engine.infer(windows, self._state, self._context)
+            probabilities = np.empty(len(windows), dtype=np.float32)
+            state, context = self._state, self._context
+            for i, window in enumerate(windows):
+                probability, state, context = self._model.infer(window[None, :], state, context)
+                probabilities[i] = probability[0]
+            return probabilities, state, context
+        except Exception as e:
+            logger.error(f"Silero VAD inference failed: {e}")
+            return np.zeros(len(windows), dtype=np.float32), self._state, self._context
+
+    def _step(self, window: bytes, confidence: float):
+        """Advance the state machine by one window (pipecat's VADAnalyzer rules)."""
+        volume = exp_smoothing(
+            calculate_audio_volume(window, self._model.sample_rate), self._prev_volume, VOLUME_SMOOTHING,
+        )
+        self._prev_volume = volume
+        speaking = confidence >= self._params.confidence and volume >= self._params.min_volume
+
+        if speaking:
+            if self._vad_state == VADState.QUIET:
+                self._vad_state = VADState.STARTING
+                self._starting_count = 1
+            elif self._vad_state == VADState.STARTING:
+                self._starting_count += 1
+            elif self._vad_state == VADState.STOPPING:
+                self._vad_state = VADState.SPEAKING
+                self._stopping_count = 0
+        else:
+            if self._vad_state == VADState.STARTING:
+                self._vad_state = VADState.QUIET
+                self._starting_count = 0
+            elif self._vad_state == VADState.SPEAKING:
+                self._vad_state = VADState.STOPPING
+                self._stopping_count = 1
+            elif self._vad_state == VADState.STOPPING:
+                self._stopping_count += 1
+
+        if self._vad_state == VADState.STARTING and self._starting_count >= self._start_frames:
+            self._vad_state = VADState.SPEAKING
+            self._starting_count = 0
+        if self._vad_state == VADState.STOPPING and self._stopping_count >= self._stop_frames:
+            self._vad_state = VADState.QUIET
+            self._stopping_count = 0
+
+    def _update_frames(self):
+        self._start_frames = round(self._params.start_secs / self._window_secs)
+        self._stop_frames = round(self._params.stop_secs / self._window_secs)
@@ -0,0 +1,123 @@
+"""Background WhatsApp forwarding, off the voice critical path.
+
+Long replies are queued here instead of being awaited before TTS. A single
+worker sends them through OpenClaw, coalescing bursts into one message and
+retrying with backoff, but only when the request never reached OpenClaw (the
+connect failed). Anything after that, a timeout, a dropped connection or any
+error status, may already have reached WhatsApp, so it is dropped rather than
+sent twice.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from openclaw_llm import OpenClawError
+
+COALESCE_SEPARATOR = "\n\n———\n\n"
+
+
+class WhatsAppForwarder:
+    """Bounded outbound queue with one retrying worker."""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        *,
+        max_queue: int = 64,
+        retries: int = 3,
+        backoff: float = 2.0,
+        coalesce_secs: float = 1.0,
+    ):
+        """
+        Args:
+            send: Delivers one message; raises on failure (retried only if OpenClawError.sent is False)
+            max_queue: Messages held before new ones are dropped
+            retries: Extra attempts per message after a failure
+            backoff: Base delay between attempts (doubles each retry)
+            coalesce_secs: How long to wait for more messages to batch into one
+        """
+        self._send = send
+        self._max_queue = max_queue
+        self._retries = retries
+        self._backoff = backoff
+        self._coalesce_secs = coalesce_secs
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Instrumentation
+        self._sent = 0
+        self._coalesced = 0
+        self._retried = 0
+        self._failed = 0
+        self._dropped = 0
+
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self._max_queue)
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._queue and not self._queue.empty():
+            logger.warning(f"WhatsApp forwarder stopped with {self._queue.qsize()} messages unsent")
+
+    def enqueue(self, text: str) -> bool:
+        """Queue a message without waiting. Returns False if it had to be dropped."""
+        if self._queue is None:
+            logger.error("WhatsApp forwarder not started, dropping message")
+            self._dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            logger.error(f"WhatsApp queue full ({self._max_queue}), dropping message")
+            self._dropped += 1
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "queueDepth": self._queue.qsize() if self._queue else 0,
+            "sent": self._sent,
+            "coalesced": self._coalesced,
+            "retried": self._retried,
+            "failed": self._failed,
+            "dropped": self._dropped,
+        }
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+
+            # Let a burst collect, then send it as one message
+            await asyncio.sleep(self._coalesce_secs)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._coalesced += len(batch) - 1
+
+            await self._deliver(COALESCE_SEPARATOR.join(batch))
+
+    async def _deliver(self, text: str):
+        for attempt in range(self._retries + 1):
+            try:
+                await self._send(text)
+                self._sent += 1
+                return
+            except Exception as e:
+                if not (isinstance(e, OpenClawError) and not e.sent):
+                    self._failed += 1
+                    logger.error(f"WhatsApp forward failed, not retrying (may have been delivered): {e}")
+                    return
+                if attempt == self._retries:
+                    self._failed += 1
+                    logger.error(f"WhatsApp forward failed after {attempt + 1} attempts: {e}")
+                    return
+                self._retried += 1
+                delay = self._backoff * 2 ** attempt
+                logger.warning(f"WhatsApp forward failed: {e} — retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
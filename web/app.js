@@ -12,9 +12,10 @@ let isInCall = false;
 let timerInterval = null;
 let callStartTime = null;
 
-// Audio playback queue
-let audioQueue = [];
-let isPlaying = false;
+// Audio playback: small PCM frames scheduled back-to-back on one context
+let playContext = null;
+let playHead = 0;
+let playingSources = [];
 
 // ── DOM ────────────────────────────────────────────────────────
 const callBtn = document.getElementById('callBtn');
@@ -162,8 +163,12 @@ function endCall() {
         mediaStream = null;
     }
 
-    audioQueue = [];
-    isPlaying = false;
+    if (playContext) {
+        playContext.close();
+        playContext = null;
+    }
+    playingSources = [];
+    playHead = 0;
 
     stopTimer();
     updateCallButton(false);
@@ -190,10 +195,21 @@ function handleControl(data) {
             addTranscript('bot', data.text);
             break;
 
+        case 'flush':
+            // Barge-in: drop whatever is still queued for playback
+            flushAudio();
+            break;
+
         case 'done':
             // Response complete
             break;
 
+        case 'busy':
+            addTranscript('bot', `📵 ${data.message}`);
+            endCall();
+            setStatus('busy');
+            break;
+
         case 'error':
             console.error('Server error:', data.message);
             addTranscript('bot', `⚠️ ${data.message}`);
@@ -203,51 +219,51 @@ function handleControl(data) {
 
 // ── Audio Playback ─────────────────────────────────────────────
 function queueAudio(arrayBuffer) {
-    audioQueue.push(arrayBuffer);
-    if (!isPlaying) {
-        playNext();
-    }
-}
-
-async function playNext() {
-    if (audioQueue.length === 0) {
-        isPlaying = false;
-        return;
-    }
-
-    isPlaying = true;
-    const buffer = audioQueue.shift();
-
     try {
-        // Create playback context if needed (may have been closed)
-        const playCtx = new AudioContext({ sampleRate: 16000 });
+        if (!playContext) {
+            playContext = new AudioContext({ sampleRate: 16000 });
+            playHead = 0;
+        }
 
         // Convert int16 PCM to float32
-        const int16 = new Int16Array(buffer);
+        const int16 = new Int16Array(arrayBuffer);
         const float32 = new Float32Array(int16.length);
         for (let i = 0; i < int16.length; i++) {
             float32[i] = int16[i] / 32768.0;
         }
 
-        const audioBuffer = playCtx.createBuffer(1, float32.length, 16000);
+        const audioBuffer = playContext.createBuffer(1, float32.length, 16000);
         audioBuffer.getChannelData(0).set(float32);
 
-        const source = playCtx.createBufferSource();
+        const source = playContext.createBufferSource();
         source.buffer = audioBuffer;
-        source.connect(playCtx.destination);
-
+        source.connect(playContext.destination);
         source.onended = () => {
-            playCtx.close();
-            playNext();
+            playingSources = playingSources.filter(s => s !== source);
         };
 
-        source.start();
+        // Schedule right after whatever is already queued, so frames play gaplessly
+        const startAt = Math.max(playContext.currentTime, playHead);
+        source.start(startAt);
+        playHead = startAt + audioBuffer.duration;
+        playingSources.push(source);
     } catch (err) {
         console.error('Audio playback error:', err);
-        isPlaying = false;
     }
 }
 
+function flushAudio() {
+    playingSources.forEach(source => {
+        try {
+            source.stop();
+        } catch (err) {
+            // Already stopped
+        }
+    });
+    playingSources = [];
+    playHead = playContext ? playContext.currentTime : 0;
+}
+
 // ── UI Updates ─────────────────────────────────────────────────
 function setStatus(state) {
     statusEl.textContent = state.charAt(0).toUpperCase() + state.slice(1);